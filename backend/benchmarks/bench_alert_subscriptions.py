@@ -0,0 +1,131 @@
+"""
+Evaluating one AQI reading against the alert subscription registry vs scanning.
+
+Run from backend/:  python -m benchmarks.bench_alert_subscriptions [--subscriptions N] [--locations L]
+Defaults to 1M subscriptions spread over 10k locations. The registry bisects
+the reading's location's sorted thresholds; the baselines scan every
+subscription in Python and with a NumPy mask. Subscriptions are seeded
+straight into a temporary SQLite database, then the benchmark times loading
+the index at startup and applying another worker's writes incrementally.
+"""
+import argparse
+import datetime
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import print_table
+from services.alert_subscriptions import AlertSubscriptionRegistry
+
+CONDITIONS = [None, "asthma", "copd", "heart_disease", "elderly", "children"]
+QUERIES = 2000
+# Subscriptions another worker changes before the registry refreshes
+REMOTE_WRITES = 1000
+
+def make_subscriptions(n_subscriptions: int, n_locations: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    locations = rng.integers(0, n_locations, n_subscriptions)
+    thresholds = rng.integers(0, 301, n_subscriptions)
+    conditions = rng.integers(0, len(CONDITIONS), n_subscriptions)
+    rows = [
+        (f"sub_{i:016x}", f"user_{i}", f"location_{location}", CONDITIONS[condition], int(threshold))
+        for i, (location, threshold, condition) in enumerate(zip(locations.tolist(), thresholds.tolist(), conditions.tolist()))
+    ]
+    return rows, locations, thresholds
+
+def seed(path: Path, rows):
+    """Write subscriptions directly with executemany (the registry creates the schema)"""
+    AlertSubscriptionRegistry(path)
+    connection = sqlite3.connect(path)
+    now = datetime.datetime.now().isoformat()
+    with connection:
+        connection.executemany(
+            "INSERT INTO alert_subscriptions"
+            " (subscription_id, user_id, location, health_condition, alert_threshold, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (row + (now,) for row in rows)
+        )
+    connection.close()
+
+def latency_ms(fn, queries) -> np.ndarray:
+    times = np.empty(len(queries))
+    for i, (location, aqi) in enumerate(queries):
+        start = time.perf_counter()
+        fn(location, aqi)
+        times[i] = time.perf_counter() - start
+    return times * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscriptions", type=int, default=1_000_000)
+    parser.add_argument("--locations", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows, location_ids, thresholds = make_subscriptions(args.subscriptions, args.locations)
+    rng = np.random.default_rng(1)
+    queries = [(int(location), float(aqi)) for location, aqi in zip(rng.integers(0, args.locations, QUERIES), rng.uniform(0, 300, QUERIES))]
+
+    path = Path(tempfile.mkdtemp(prefix="bench_alerts_")) / "alert_subscriptions.db"
+    start = time.perf_counter()
+    seed(path, rows)
+    seed_s = time.perf_counter() - start
+    start = time.perf_counter()
+    registry = AlertSubscriptionRegistry(path, check_interval=0)
+    load_s = time.perf_counter() - start
+    assert registry.info()["subscriptions"] == args.subscriptions
+
+    def indexed(location, aqi):
+        return registry.evaluate(f"location_{location}", aqi)
+
+    def python_scan(location, aqi):
+        name = f"location_{location}"
+        return [row for row in rows if row[2] == name and row[4] < aqi]
+
+    def numpy_scan(location, aqi):
+        return np.flatnonzero((location_ids == location) & (thresholds < aqi))
+
+    # Every approach must find the same subscribers
+    for location, aqi in queries[:20]:
+        expected = {f"user_{i}" for i in numpy_scan(location, aqi)}
+        assert {subscription[1] for subscription in indexed(location, aqi)} == expected
+        assert {row[1] for row in python_scan(location, aqi)} == expected
+
+    triggered = np.mean([len(indexed(location, aqi)) for location, aqi in queries])
+    results = {
+        "registry (bisect)": latency_ms(indexed, queries),
+        "numpy mask scan": latency_ms(numpy_scan, queries),
+        "python scan": latency_ms(python_scan, queries[:20])
+    }
+    table = [
+        [name, f"{np.median(times):.4f}", f"{np.percentile(times, 99):.4f}", f"{np.median(results['python scan']) / np.median(times):,.0f}x"]
+        for name, times in results.items()
+    ]
+    print_table(
+        f"One AQI reading vs {args.subscriptions:,} subscriptions over {args.locations:,} locations "
+        f"(avg {triggered:.0f} triggered)",
+        ["approach", "p50 ms", "p99 ms", "vs python scan"], table
+    )
+
+    # Another worker re-subscribes some users; the next call applies only those changes
+    remote = AlertSubscriptionRegistry(path)
+    for _, user_id, location, condition, threshold in rows[:REMOTE_WRITES]:
+        remote.subscribe(user_id, location, condition, (threshold + 50) % 301)
+    start = time.perf_counter()
+    registry.evaluate("location_0", 100.0)
+    refresh_s = time.perf_counter() - start
+    assert registry.get(rows[0][0])["alert_threshold"] == (rows[0][4] + 50) % 301
+    print_table(
+        "SQLite persistence",
+        ["operation", "seconds"],
+        [
+            ["seed all subscriptions (executemany)", f"{seed_s:.2f}"],
+            ["load index at startup", f"{load_s:.2f}"],
+            [f"apply {REMOTE_WRITES:,} changes from another worker", f"{refresh_s:.4f}"]
+        ]
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput of /predict/batch vs the per-request /predict path.
+
+Run from backend/:  python -m benchmarks.bench_batch_predict
+Uses models/xgb_model.pkl and the real training dataset when present,
+otherwise trains a small XGBoost model on synthetic data.
+"""
+import numpy as np
+
+from benchmarks.common import (
+    MODELS_DIR, time_call, make_synthetic_training_data,
+    use_synthetic_feature_template, random_inputs, print_table
+)
+import models.air_quality as air_quality
+from schemas.air_quality import AQIPredictionRequest
+from services.feature_template import feature_templates
+
+SIZES = [1, 100, 10_000]
+
+def setup_model():
+    """Load the trained model, or fit a stand-in on synthetic data"""
+    if (MODELS_DIR / "xgb_model.pkl").exists() and feature_templates.data_path.exists():
+        air_quality.load_feature_template()
+        air_quality.load_xgb_model()
+        return
+    import xgboost as xgb
+    training_data = make_synthetic_training_data()
+    template = use_synthetic_feature_template(training_data)
+    model = xgb.XGBRegressor(n_estimators=500, max_depth=6, learning_rate=0.05)
+    model.fit(training_data[template.feature_cols].to_numpy(), training_data["AQI"].to_numpy())
+    air_quality.xgb_model = model
+
+def per_request(columns):
+    """Current path: one feature vector and one predict call per row"""
+    n_rows = len(columns["pm25"])
+    for i in range(n_rows):
+        request = AQIPredictionRequest(**{field: float(values[i]) for field, values in columns.items()})
+        features = air_quality.create_feature_vector(request)
+        aqi_pred = air_quality.xgb_model.predict([features])[0]
+        air_quality.get_aqi_category(aqi_pred)
+
+def batched(columns):
+    """Batch path: one feature matrix and one predict call"""
+    air_quality.predict_aqi_columns(columns)
+
+def main():
+    setup_model()
+    rows = []
+    for n_rows in SIZES:
+        columns = random_inputs(n_rows)
+        # Keep the per-request run bounded at 10k rows
+        repeat = 1 if n_rows >= 10_000 else 3
+        t_single = time_call(lambda: per_request(columns), repeat)
+        t_batch = time_call(lambda: batched(columns), 3)
+        rows.append([
+            n_rows,
+            f"{n_rows / t_single:,.0f}",
+            f"{n_rows / t_batch:,.0f}",
+            f"{t_single / t_batch:.1f}x"
+        ])
+    print_table("AQI prediction throughput (rows/sec)", ["rows", "per-request", "batch", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Throughput of /carbon/calculate/batch vs the per-request /carbon/calculate path.
+
+Run from backend/:  python -m benchmarks.bench_carbon_batch
+Also checks that both paths produce the same totals and categories, and
+that every breakdown component matches exactly on survey-style inputs
+(whole miles, percentage shares, quantities in survey steps), where
+component sums land on rounding halves far more often than uniform inputs do.
+"""
+import numpy as np
+
+from benchmarks.common import time_call, print_table
+import models.carbon_tracker as carbon_tracker
+from schemas.carbon import CarbonCalculationRequest, CARBON_INPUT_RANGES
+
+SIZES = [1, 1_000, 100_000, 500_000]
+EQUIVALENCE_ROWS = 100_000
+
+# Answer granularity of a lifestyle survey for each input
+SURVEY_STEPS = {
+    "daily_miles": 1,
+    "public_transit_usage": 0.01,
+    "electric_vehicle_usage": 0.01,
+    "meat_consumption": 0.05,
+    "dairy_consumption": 0.05,
+    "vegetable_consumption": 0.1,
+    "electronics_purchases": 1,
+    "clothing_purchases": 1,
+    "furniture_purchases": 1
+}
+
+def random_survey(n_rows: int, seed: int = 0):
+    """Columnar survey rows within the API's validated ranges"""
+    rng = np.random.default_rng(seed)
+    columns = {field: rng.uniform(low, high, n_rows) for field, (low, high) in CARBON_INPUT_RANGES.items()}
+    # Transit and EV shares of the same miles should not exceed 1
+    columns["electric_vehicle_usage"] *= 1 - columns["public_transit_usage"]
+    return columns
+
+def discrete_survey(n_rows: int, seed: int = 0):
+    """Columnar survey rows on the answer grid of SURVEY_STEPS"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for field, (low, high) in CARBON_INPUT_RANGES.items():
+        step = SURVEY_STEPS[field]
+        columns[field] = np.round(low + step * rng.integers(0, round((high - low) / step) + 1, n_rows), 2)
+    # Keep the EV share within what transit leaves, on the same 0.01 grid
+    columns["electric_vehicle_usage"] = np.round(
+        np.floor(rng.uniform(0, 1, n_rows) * (1 - columns["public_transit_usage"]) * 100 + 1e-9) / 100, 2
+    )
+    return columns
+
+def breakdown_mismatches(columns) -> int:
+    """Rows where any breakdown component differs between the scalar and batch paths"""
+    batch = carbon_tracker.calculate_carbon_columns(columns)
+    mismatches = 0
+    for i in range(len(columns["daily_miles"])):
+        row = carbon_tracker.calculate_carbon_row({field: float(values[i]) for field, values in columns.items()})
+        mismatches += any(value != batch[field][i] for field, value in row.items())
+    return mismatches
+
+def per_request(columns):
+    """Current path: one validated request and scalar evaluation per row"""
+    n_rows = len(columns["daily_miles"])
+    totals, categories = [], []
+    for i in range(n_rows):
+        request = CarbonCalculationRequest(**{field: float(values[i]) for field, values in columns.items()})
+        breakdown = carbon_tracker.calculate_carbon_row({field: getattr(request, field) for field in CARBON_INPUT_RANGES})
+        total = sum(breakdown.values())
+        totals.append(total)
+        categories.append(carbon_tracker.get_carbon_category(total))
+    return np.array(totals), np.array(categories, dtype=object)
+
+def batched(columns):
+    """Batch path: one vectorized pass over all rows"""
+    result = carbon_tracker.calculate_carbon_columns(columns)
+    return result["total_daily_co2"], result["category"]
+
+def main():
+    for name, columns in (("uniform", random_survey(EQUIVALENCE_ROWS)), ("survey-style", discrete_survey(EQUIVALENCE_ROWS))):
+        mismatches = breakdown_mismatches(columns)
+        print(f"{name} inputs: {mismatches} of {EQUIVALENCE_ROWS:,} rows differ between scalar and batch breakdowns")
+        assert mismatches == 0
+    
+    rows = []
+    for n_rows in SIZES:
+        columns = random_survey(n_rows)
+        single_totals, single_categories = per_request(columns)
+        batch_totals, batch_categories = batched(columns)
+        max_diff = float(np.max(np.abs(single_totals - batch_totals)))
+        category_match = float(np.mean(single_categories == batch_categories))
+
+        repeat = 1 if n_rows >= 100_000 else 3
+        t_single = time_call(lambda: per_request(columns), repeat)
+        t_batch = time_call(lambda: batched(columns), 3)
+        rows.append([
+            f"{n_rows:,}",
+            f"{n_rows / t_single:,.0f}",
+            f"{n_rows / t_batch:,.0f}",
+            f"{t_single / t_batch:,.1f}x",
+            f"{max_diff:.2g}",
+            f"{category_match:.4%}"
+        ])
+    print_table(
+        "Carbon footprint scoring throughput (rows/sec)",
+        ["rows", "per-request", "batch", "speedup", "max diff", "category match"], rows
+    )
+
+if __name__ == "__main__":
+    main()
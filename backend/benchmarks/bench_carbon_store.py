@@ -0,0 +1,104 @@
+"""
+History query and write latency of the SQLite carbon store at scale.
+
+Run from backend/:  python -m benchmarks.bench_carbon_store [--users N] [--days D]
+Defaults to 1M users x 365 entries (365M rows, roughly 45 GB on disk and a
+long load); pass smaller --users for a quick run. Latency should stay flat as
+the table grows, since history reads are index range scans and percentile
+ranks come from the quantile sketch.
+"""
+import argparse
+import datetime
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import print_table
+from services.carbon_store import SQLiteCarbonStore, MemoryCarbonStore
+
+USERS_PER_TRANSACTION = 1000
+QUERIES = 2000
+
+def make_entries(rng: np.random.Generator, days: int, start: datetime.date):
+    """One user's daily entries"""
+    components = np.round(rng.uniform(0, 30, (days, 3)), 2)
+    totals = components.sum(axis=1)
+    for day in range(days):
+        total = float(totals[day])
+        yield {
+            "date": (start + datetime.timedelta(days=day)).isoformat(),
+            "total_daily_co2": total,
+            "category": "Low" if total < 20 else "Medium" if total < 40 else "High" if total < 60 else "Very High",
+            "breakdown": dict(zip(("transportation", "food", "consumer"), components[day].tolist()))
+        }
+
+def populate(store, n_users: int, days: int, seed: int = 0) -> float:
+    rng = np.random.default_rng(seed)
+    start = datetime.date(2025, 1, 1)
+    t0 = time.perf_counter()
+    for first in range(0, n_users, USERS_PER_TRANSACTION):
+        rows = [
+            (f"user_{user}", entry)
+            for user in range(first, min(first + USERS_PER_TRANSACTION, n_users))
+            for entry in make_entries(rng, days, start)
+        ]
+        if isinstance(store, SQLiteCarbonStore):
+            store.add_entries(rows)
+        else:
+            for user_id, entry in rows:
+                store.add_entry(user_id, entry)
+        if first and first % (USERS_PER_TRANSACTION * 100) == 0:
+            print(f"  {first:,} users loaded ({time.perf_counter() - t0:.0f}s)")
+    return time.perf_counter() - t0
+
+def latency_ms(fn, n_users: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    users = rng.integers(0, n_users, QUERIES)
+    times = np.empty(QUERIES)
+    for i, user in enumerate(users):
+        t0 = time.perf_counter()
+        fn(f"user_{user}")
+        times[i] = time.perf_counter() - t0
+    return times * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--path", type=Path, default=None, help="Database file (default: temp dir)")
+    args = parser.parse_args()
+
+    path = args.path or Path(tempfile.mkdtemp(prefix="bench_carbon_")) / "carbon_history.db"
+    stores = {"sqlite": SQLiteCarbonStore(path)}
+    # The in-memory store is only a reference point at sizes that fit in RAM
+    if args.users * args.days <= 2_000_000:
+        stores["memory"] = MemoryCarbonStore()
+
+    rows = []
+    for name, store in stores.items():
+        print(f"Loading {args.users:,} users x {args.days} entries into {name} store...")
+        load_s = populate(store, args.users, args.days)
+        results = {
+            "history 30d": latency_ms(lambda user: store.history(user, 30), args.users),
+            "history 365d": latency_ms(lambda user: store.history(user, 365), args.users),
+            "has_user": latency_ms(store.has_user, args.users),
+            "percentile": latency_ms(lambda user: store.percentile(30.0), args.users),
+            "add_entry": latency_ms(
+                lambda user: store.add_entry(user, next(make_entries(np.random.default_rng(), 1, datetime.date(2026, 1, 1)))),
+                args.users
+            )
+        }
+        for operation, times in results.items():
+            rows.append([name, operation, f"{np.median(times):.3f}", f"{np.percentile(times, 99):.3f}"])
+        print(f"  loaded in {load_s:.1f}s ({args.users * args.days / load_s:,.0f} rows/s)")
+
+    size_mb = sum(p.stat().st_size for p in path.parent.glob(path.name + "*")) / 1e6
+    print_table(
+        f"Carbon history store latency ({args.users:,} users x {args.days} entries, sqlite {size_mb:,.0f} MB)",
+        ["store", "operation", "p50 ms", "p99 ms"], rows
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Requests/sec of live GPT-2 generation with and without dynamic batching.
+
+Run from backend/:  python -m benchmarks.bench_gpt_batching
+Uses models/gpt_text_model when its weights are present, otherwise a randomly
+initialised model built from the same config (same architecture, so the same
+cost per token). Runs on CPU with the "gpt" lane limited to one generation at
+a time, as in production.
+"""
+import asyncio
+import time
+
+from benchmarks.common import MODELS_DIR, print_table
+import models.health_advisor as health_advisor
+from services.executor import model_executor
+
+CONCURRENCY = [1, 8, 32]
+REQUESTS_PER_CLIENT = 2
+CONDITIONS = ["asthma", "copd", "heart_disease", "allergies"]
+
+def setup_model():
+    """Load the fine-tuned model, or a random-weight stand-in with its config"""
+    model, _ = health_advisor.load_gpt_model()
+    if model is not None:
+        return
+    from transformers import GPT2Config, GPT2LMHeadModel, GPT2Tokenizer
+    model_path = MODELS_DIR / "gpt_text_model"
+    print("Using random weights with the fine-tuned model's config")
+    tokenizer = GPT2Tokenizer.from_pretrained(model_path)
+    tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+    health_advisor.gpt_tokenizer = tokenizer
+    health_advisor.gpt_model = GPT2LMHeadModel(GPT2Config.from_pretrained(model_path)).eval()
+
+async def run_clients(concurrency: int) -> float:
+    """Requests/sec with `concurrency` clients each sending requests back to back"""
+    async def client(i: int):
+        for j in range(REQUESTS_PER_CLIENT):
+            condition = CONDITIONS[(i + j) % len(CONDITIONS)]
+            await health_advisor.gpt_dispatcher.submit((condition, 40.0 + 10 * i, j % 5 + 1, None))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return concurrency * REQUESTS_PER_CLIENT / (time.perf_counter() - start)
+
+async def measure() -> list:
+    # One event loop for all runs, since lane semaphores bind to the loop
+    rows = []
+    for concurrency in CONCURRENCY:
+        health_advisor.gpt_dispatcher.configure(enabled=False)
+        unbatched = await run_clients(concurrency)
+        health_advisor.gpt_dispatcher.configure(enabled=True, max_batch_size=concurrency, max_wait_ms=20.0)
+        batched = await run_clients(concurrency)
+        rows.append([concurrency, f"{unbatched:.2f}", f"{batched:.2f}", f"{batched / unbatched:.1f}x"])
+    return rows
+
+def main():
+    setup_model()
+    model_executor.configure("gpt", kind="thread", max_concurrency=1)
+    # Warm up the generation path
+    health_advisor.generate_recommendation_batch([("asthma", 80.0, 2, None)])
+
+    rows = asyncio.run(measure())
+    model_executor.shutdown()
+    print_table("GPT-2 generation throughput (requests/sec)", ["concurrency", "unbatched", "batched", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
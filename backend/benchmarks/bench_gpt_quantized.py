@@ -0,0 +1,124 @@
+"""
+Quality, latency and RSS of int8-quantized GPT-2 vs the fp32 model.
+
+Run from backend/:  python -m benchmarks.bench_gpt_quantized
+Prompts are the headings of data/ml_ready/text_suggestions.txt. Both
+precisions decode greedily so their outputs are directly comparable, and each
+runs in a fresh interpreter so peak RSS is not shared. Falls back to
+random weights with the fine-tuned model's config when the weights are
+missing, which still measures speed and memory but not text quality.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import print_table
+
+SUGGESTIONS_PATH = Path(__file__).parent.parent.parent / "data/ml_ready/text_suggestions.txt"
+NEW_TOKENS = 40
+
+CHILD = r"""
+import json, os, resource, sys, time
+sys.path.insert(0, os.getcwd())
+precision, prompts_path, new_tokens = sys.argv[1], sys.argv[2], int(sys.argv[3])
+import torch
+import models.health_advisor as health_advisor
+from services.gpt_quantization import quantize_dynamic_int8, model_size_bytes
+torch.manual_seed(0)
+start = time.perf_counter()
+model, tokenizer = health_advisor.load_gpt_model(precision)
+weights = "fine-tuned"
+if model is None:
+    from transformers import GPT2Config, GPT2LMHeadModel, GPT2Tokenizer
+    from benchmarks.common import MODELS_DIR
+    model_path = MODELS_DIR / "gpt_text_model"
+    tokenizer = GPT2Tokenizer.from_pretrained(model_path)
+    model = GPT2LMHeadModel(GPT2Config.from_pretrained(model_path)).eval()
+    if precision == "int8":
+        model = quantize_dynamic_int8(model)
+    weights = "random"
+loaded = time.perf_counter()
+prompts = json.load(open(prompts_path))
+outputs, latencies = [], []
+with torch.no_grad():
+    for prompt in prompts:
+        inputs = tokenizer(prompt, return_tensors="pt")
+        t0 = time.perf_counter()
+        output = model.generate(**inputs, max_new_tokens=new_tokens, min_new_tokens=new_tokens,
+                                do_sample=False, pad_token_id=tokenizer.eos_token_id)
+        latencies.append(time.perf_counter() - t0)
+        outputs.append(output[0, inputs["input_ids"].shape[1]:].tolist())
+print(json.dumps({
+    "weights": weights,
+    "load_s": loaded - start,
+    "latencies": latencies,
+    "outputs": outputs,
+    "size_mb": model_size_bytes(model) / 1e6,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+def load_prompts() -> list:
+    """Non-bullet lines of the training text, i.e. the section headings"""
+    lines = [line.strip() for line in SUGGESTIONS_PATH.read_text().splitlines()]
+    return [line for line in lines if line and not line.startswith("-")]
+
+def run_child(precision: str, prompts_path: Path) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, precision, str(prompts_path), str(NEW_TOKENS)],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(lines[-1])
+
+def agreement(reference: list, candidate: list) -> float:
+    """Fraction of tokens generated before the candidate first diverges from the reference"""
+    for i, (a, b) in enumerate(zip(reference, candidate)):
+        if a != b:
+            return i / len(reference)
+    return 1.0
+
+def main():
+    import tempfile
+    import numpy as np
+
+    prompts = load_prompts()
+    prompts_path = Path(tempfile.mkdtemp(prefix="bench_gpt_")) / "prompts.json"
+    prompts_path.write_text(json.dumps(prompts))
+    results = {precision: run_child(precision, prompts_path) for precision in ("fp32", "int8")}
+
+    errors = {precision: result["error"] for precision, result in results.items() if "error" in result}
+    if errors:
+        for precision, error in errors.items():
+            print(f"❌ {precision} run failed: {error}")
+        return
+
+    rows = []
+    for precision, result in results.items():
+        latencies = np.array(result["latencies"]) * 1000
+        rows.append([
+            precision,
+            f"{result['load_s']:.2f}",
+            f"{np.median(latencies):.0f}",
+            f"{NEW_TOKENS / np.median(latencies) * 1000:.1f}",
+            f"{result['size_mb']:.0f}",
+            f"{result['max_rss_mb']:.0f}"
+        ])
+    print_table(
+        f"GPT-2 fp32 vs int8 over {len(prompts)} prompts ({results['fp32']['weights']} weights, greedy, {NEW_TOKENS} tokens)",
+        ["precision", "load s", "median ms", "tokens/s", "weights MB", "peak RSS MB"], rows
+    )
+
+    fp32, int8 = results["fp32"], results["int8"]
+    scores = [agreement(a, b) for a, b in zip(fp32["outputs"], int8["outputs"])]
+    exact = sum(a == b for a, b in zip(fp32["outputs"], int8["outputs"]))
+    speedup = np.median(fp32["latencies"]) / np.median(int8["latencies"])
+    print(f"\nIdentical outputs: {exact}/{len(prompts)}")
+    print(f"Mean tokens before divergence: {np.mean(scores) * 100:.0f}%")
+    print(f"Latency: {speedup:.2f}x faster, RSS: {int8['max_rss_mb'] - fp32['max_rss_mb']:+.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup time, RSS and latency of the NumPy LSTM runtime vs Keras.
+
+Run from backend/:  python -m benchmarks.bench_lstm_runtime
+Needs models/lstm_model.h5 and, for the NumPy runtime, the export written by
+data-pipeline/training/export_lstm.py. Each runtime is measured in a fresh
+interpreter so import cost and peak RSS are not shared.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import print_table
+
+CHILD = r"""
+import json, os, resource, sys, time
+sys.path.insert(0, os.getcwd())
+os.environ["LSTM_RUNTIME"] = sys.argv[1]
+start = time.perf_counter()
+import numpy as np
+import models.forecast as forecast
+imported = time.perf_counter()
+model = forecast.load_lstm_model()
+loaded = time.perf_counter()
+if model is None:
+    print(json.dumps({"error": "model failed to load"}))
+    sys.exit(0)
+n_features = model.layers[0]["kernel"].shape[0] if isinstance(model, forecast.NumpyLSTMModel) else model.input_shape[-1]
+rng = np.random.default_rng(0)
+single = rng.random((1, 24, n_features)).astype(np.float32)
+batch = rng.random((2000, 24, n_features)).astype(np.float32)
+first = model.predict(single, verbose=0)
+first_done = time.perf_counter()
+t0 = time.perf_counter()
+for _ in range(20):
+    model.predict(single, verbose=0)
+t_single = (time.perf_counter() - t0) / 20
+t0 = time.perf_counter()
+out = model.predict(batch, verbose=0)
+t_batch = time.perf_counter() - t0
+np.save(sys.argv[2], np.asarray(out))
+print(json.dumps({
+    "runtime": type(model).__name__,
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "first_predict_s": first_done - loaded,
+    "single_ms": t_single * 1000,
+    "batch2000_ms": t_batch * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+def run_child(runtime: str, out_path: Path) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, runtime, str(out_path)],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(lines[-1])
+
+def main():
+    import numpy as np
+    import tempfile
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="bench_lstm_"))
+    results = {runtime: run_child(runtime, tmp_dir / f"{runtime}.npy") for runtime in ("auto", "keras")}
+
+    rows = []
+    for label, result in (("numpy", results["auto"]), ("keras", results["keras"])):
+        if "error" in result:
+            rows.append([label, "unavailable: " + result["error"][:60], "", "", "", "", ""])
+            continue
+        rows.append([
+            label if result["runtime"] == "NumpyLSTMModel" or label == "keras" else f"{label} (no export, fell back)",
+            f"{result['import_s']:.2f}",
+            f"{result['load_s']:.2f}",
+            f"{result['first_predict_s'] * 1000:.1f}",
+            f"{result['single_ms']:.2f}",
+            f"{result['batch2000_ms']:.1f}",
+            f"{result['max_rss_mb']:.0f}"
+        ])
+    print_table(
+        "LSTM runtime comparison",
+        ["runtime", "import s", "load s", "1st predict ms", "1-row ms", "2000-row ms", "peak RSS MB"],
+        rows
+    )
+
+    if all("error" not in r for r in results.values()):
+        diff = np.abs(np.load(tmp_dir / "auto.npy") - np.load(tmp_dir / "keras.npy")).max()
+        print(f"\nMax abs difference between runtimes: {diff:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Equivalence and latency of compiled tree ensembles vs the native models.
+
+Run from backend/:  python -m benchmarks.bench_tree_ensemble
+Uses models/xgb_model.pkl and models/metadata_model.pkl when present,
+otherwise fits stand-in models on synthetic data.
+"""
+import warnings
+import joblib
+import numpy as np
+
+from benchmarks.common import MODELS_DIR, time_call, print_table
+from services.tree_ensemble import (
+    compile_xgboost, compile_sklearn_forest, check_equivalence, TreeEnsemblePredictor
+)
+
+SIZES = [1, 10_000]
+
+def load_or_fit(kind: str):
+    """Load the trained model, or fit a stand-in with the training script's settings"""
+    path = MODELS_DIR / ("xgb_model.pkl" if kind == "xgboost" else "metadata_model.pkl")
+    if path.exists():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return joblib.load(path)
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((2000, 40))
+    y = X[:, 0] * 10 + X[:, 1] ** 2 + rng.normal(size=2000)
+    if kind == "xgboost":
+        import xgboost as xgb
+        model = xgb.XGBRegressor(n_estimators=500, learning_rate=0.05, max_depth=6)
+    else:
+        from sklearn.ensemble import RandomForestRegressor
+        model = RandomForestRegressor(n_estimators=300, max_depth=10)
+    return model.fit(X, y)
+
+def main():
+    rows = []
+    for kind, compile_fn in (("xgboost", compile_xgboost), ("random_forest", compile_sklearn_forest)):
+        native = load_or_fit(kind)
+        compiled = compile_fn(native)
+        hybrid = TreeEnsemblePredictor(native, compiled)
+
+        # Equivalence on wide-range and unit-scale inputs, both with NaNs
+        diff = max(check_equivalence(native, compiled, 2000, scale, seed)
+                   for seed, scale in enumerate((1.0, 100.0)))
+        status = "OK" if diff <= 1e-3 else "MISMATCH"
+        print(f"{kind}: {compiled.n_trees} trees, depth {compiled.max_depth}, "
+              f"{compiled.nbytes / 1024:.0f} KiB, max abs diff {diff:.2e} [{status}]")
+
+        rng = np.random.default_rng(1)
+        for n_rows in SIZES:
+            X = rng.standard_normal((n_rows, compiled.n_features)).astype(np.float32)
+            repeat = 200 if n_rows == 1 else 3
+            t_native = time_call(lambda: [native.predict(X) for _ in range(repeat)], 1) / repeat
+            t_compiled = time_call(lambda: [compiled.predict(X) for _ in range(repeat)], 1) / repeat
+            t_hybrid = time_call(lambda: [hybrid.predict(X) for _ in range(repeat)], 1) / repeat
+            rows.append([
+                kind, n_rows,
+                f"{t_native * 1000:.3f}", f"{t_compiled * 1000:.3f}", f"{t_hybrid * 1000:.3f}"
+            ])
+
+    print_table("Predict latency (ms per call)", ["model", "rows", "native", "compiled", "served"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
+import os
+import time
+import tempfile
+from pathlib import Path
+from typing import Optional
 
 # Import model modules
 import models.air_quality as air_quality
@@ -9,42 +15,131 @@ import models.forecast as forecast
 import models.carbon_tracker as carbon_tracker
 import models.health_advisor as health_advisor
 import models.alert_system as alert_system
+from services.feature_template import feature_templates
+from services.inference_dispatcher import dispatchers
+from services.executor import model_executor
+from services.model_manager import model_manager
+from services.admission import AdmissionMiddleware, admission_controller
+from services.loop_monitor import LoopLagMonitor
+from services.profiler import ProfileStore, ProfilingMiddleware, is_operator
+from services.instrumentation import MetricsMiddleware, register_route_prefix
+from utils.metrics import metrics_registry
 
-# Global model variables
-models = {}
+# Model loaders and display names
+MODEL_LOADERS = {
+    "feature_template": (air_quality.load_feature_template, "Feature template"),
+    "xgb": (air_quality.load_xgb_model, "XGBoost model"),
+    "lstm": (forecast.load_lstm_model, "LSTM model"),
+    "gpt": (health_advisor.load_gpt_model, "GPT-2 model"),
+    "advice_bank": (health_advisor.load_advice_bank, "Health advice bank"),
+    "rf": (alert_system.load_rf_model, "Random Forest model")
+}
+
+# Per-model load mode: "eager" loads at startup (in parallel), "lazy" loads on
+# first request, "disabled" never loads. Override with e.g. GPT_MODEL_MODE=lazy
+# When the advice bank is built, GPT-2 is only needed for out-of-bank inputs
+DEFAULT_MODEL_MODES = {
+    "advice_bank": "eager" if health_advisor.advice_bank_available() else "disabled",
+    "gpt": "lazy" if health_advisor.advice_bank_available() else "eager"
+}
+MODEL_CONFIG = {
+    name: {"mode": os.getenv(f"{name.upper()}_MODEL_MODE", DEFAULT_MODEL_MODES.get(name, "eager"))}
+    for name in MODEL_LOADERS
+}
+
+# Per-model execution lanes for blocking inference and storage I/O. Thread lanes suit
+# GIL-releasing libraries; use "process" for GIL-bound pure-Python work.
+EXECUTION_CONFIG = {
+    "xgb": {"kind": "thread", "max_concurrency": 4},
+    "lstm": {"kind": "thread", "max_concurrency": 2},
+    "gpt": {"kind": "thread", "max_concurrency": 1},
+    "carbon_store": {"kind": "thread", "max_concurrency": 4},
+    "carbon": {"kind": "thread", "max_concurrency": 2},
+    "alert_store": {"kind": "thread", "max_concurrency": 2}
+}
+
+# Per-model micro-batching: concurrent requests are flushed as one batch
+# when max_batch_size is reached or the oldest has waited max_wait_ms
+BATCHING_CONFIG = {
+    "xgb": {"enabled": True, "max_batch_size": 64, "max_wait_ms": 2.0},
+    "lstm": {"enabled": True, "max_batch_size": 32, "max_wait_ms": 5.0},
+    "gpt": {
+        "enabled": os.getenv("GPT_BATCHING", "true").lower() == "true",
+        "max_batch_size": int(os.getenv("GPT_MAX_BATCH_SIZE", "8")),
+        "max_wait_ms": float(os.getenv("GPT_MAX_WAIT_MS", "20"))
+    }
+}
+
+# Admission control: each cost class bounds concurrent requests and queued
+# requests; beyond that requests get 503 with Retry-After. Only routes that
+# run models or bulk scoring are listed; the rest are cheap and never limited.
+COST_CLASSES = {
+    "heavy": {"max_concurrency": 4, "max_queue": 8, "queue_timeout_ms": 2000, "retry_after": 5},
+    "medium": {"max_concurrency": 32, "max_queue": 64, "queue_timeout_ms": 1000, "retry_after": 1}
+}
+ROUTE_COSTS = {
+    ("POST", "/api/v1/forecast/24hour"): "heavy",
+    ("POST", "/api/v1/health/recommendations"): "heavy",
+    ("POST", "/api/v1/health/personalized"): "heavy",
+    ("POST", "/api/v1/air-quality/predict/batch"): "heavy",
+    ("POST", "/api/v1/carbon/calculate/batch"): "heavy",
+    ("POST", "/api/v1/carbon/scenarios"): "heavy",
+    ("POST", "/api/v1/air-quality/predict"): "medium",
+    ("POST", "/api/v1/air-quality/location"): "medium"
+}
+admission_controller.configure(COST_CLASSES, ROUTE_COSTS)
+
+# On-demand request profiling for operators: send "X-Profile: 1" (or ?profile=1)
+# with X-Operator-Token. Nothing is installed unless enabled with a token.
+PROFILING_CONFIG = {
+    "enabled": os.getenv("PROFILING_ENABLED", "false").lower() == "true",
+    "token": os.getenv("PROFILING_TOKEN", ""),
+    "interval_ms": float(os.getenv("PROFILING_INTERVAL_MS", "5")),
+    "directory": os.getenv("PROFILE_DIR", str(Path(tempfile.gettempdir()) / "air-quality-profiles"))
+}
+profile_store = ProfileStore(PROFILING_CONFIG["directory"])
+
+# Event-loop lag probe; stalls longer than stall_ms are recorded with the blocking stack
+LOOP_MONITOR_CONFIG = {
+    "enabled": os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true",
+    "interval_ms": float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100")),
+    "stall_ms": float(os.getenv("LOOP_MONITOR_STALL_MS", "250"))
+}
+loop_monitor = LoopLagMonitor(LOOP_MONITOR_CONFIG["interval_ms"], LOOP_MONITOR_CONFIG["stall_ms"])
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load models on startup
-    print("Loading models...")
-    try:
-        models['xgb'] = air_quality.load_xgb_model()
-        print("✅ XGBoost model loaded")
-    except Exception as e:
-        print(f"⚠️  XGBoost model loading failed: {e}")
+    if LOOP_MONITOR_CONFIG["enabled"]:
+        # Started first so blocking work during model loading shows up too
+        loop_monitor.start()
+    
+    for name, config in EXECUTION_CONFIG.items():
+        model_executor.configure(name, **config)
     
-    try:
-        models['lstm'] = forecast.load_lstm_model()
-        print("✅ LSTM model loaded")
-    except Exception as e:
-        print(f"⚠️  LSTM model loading failed: {e}")
+    # Load eager models concurrently; lazy models load on first request
+    print("Loading models...")
+    start = time.perf_counter()
+    for name, (loader, _) in MODEL_LOADERS.items():
+        model_manager.register(name, loader, MODEL_CONFIG.get(name, {}).get("mode", "eager"))
+    await model_manager.start()
     
-    try:
-        models['gpt'] = health_advisor.load_gpt_model()
-        print("✅ GPT-2 model loaded")
-    except Exception as e:
-        print(f"⚠️  GPT-2 model loading failed: {e}")
+    for name, status in model_manager.status().items():
+        if status["state"] == "ready":
+            print(f"✅ {MODEL_LOADERS[name][1]} loaded in {status['load_seconds']}s")
+        elif status["state"] == "failed":
+            print(f"⚠️  {MODEL_LOADERS[name][1]} loading failed: {status['error']}")
+        else:
+            print(f"⏸️  {MODEL_LOADERS[name][1]} is {status['mode']}")
     
-    try:
-        models['rf'] = alert_system.load_rf_model()
-        print("✅ Random Forest model loaded")
-    except Exception as e:
-        print(f"⚠️  Random Forest model loading failed: {e}")
+    for name, config in BATCHING_CONFIG.items():
+        dispatchers.configure(name, **config)
     
-    print("Model loading completed!")
+    print(f"Model loading completed in {time.perf_counter() - start:.2f}s!")
     yield
     # Cleanup on shutdown
     print("Shutting down...")
+    loop_monitor.stop()
+    model_executor.shutdown()
 
 app = FastAPI(
     title="Air Quality Prediction API",
@@ -53,6 +148,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Runs ahead of routing so rejected requests cost almost nothing; added before
+# CORS so it sits inside it and browsers can read the 503 and its Retry-After
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -60,14 +159,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+if PROFILING_CONFIG["enabled"]:
+    if PROFILING_CONFIG["token"]:
+        app.add_middleware(ProfilingMiddleware, store=profile_store, token=PROFILING_CONFIG["token"],
+                           interval_ms=PROFILING_CONFIG["interval_ms"])
+    else:
+        print("⚠️  PROFILING_ENABLED is set but PROFILING_TOKEN is empty; profiling disabled")
+
+# Outermost, so shed requests and middleware time are included
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
-app.include_router(air_quality.router, prefix="/api/v1/air-quality", tags=["Air Quality"])
-app.include_router(forecast.router, prefix="/api/v1/forecast", tags=["Forecast"])
-app.include_router(carbon_tracker.router, prefix="/api/v1/carbon", tags=["Carbon"])
-app.include_router(health_advisor.router, prefix="/api/v1/health", tags=["Health"])
-app.include_router(alert_system.router, prefix="/api/v1/alerts", tags=["Alerts"])
+ROUTERS = [
+    (air_quality.router, "/api/v1/air-quality", "Air Quality"),
+    (forecast.router, "/api/v1/forecast", "Forecast"),
+    (carbon_tracker.router, "/api/v1/carbon", "Carbon"),
+    (health_advisor.router, "/api/v1/health", "Health"),
+    (alert_system.router, "/api/v1/alerts", "Alerts")
+]
+for router, prefix, tag in ROUTERS:
+    app.include_router(router, prefix=prefix, tags=[tag])
+    register_route_prefix(router, prefix)
 
 @app.get("/")
 async def root():
@@ -75,7 +190,70 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "models_loaded": len(models)}
+    """Liveness plus per-model readiness and load timings"""
+    return {
+        "status": "healthy",
+        "ready": model_manager.is_ready(),
+        "models_loaded": model_manager.ready_count(),
+        "models": model_manager.status(),
+        "feature_template": feature_templates.info(),
+        "advice_bank": health_advisor.advice_bank.info() if health_advisor.advice_bank else None
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until every eager model has loaded"""
+    ready = model_manager.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "models": model_manager.status()}
+    )
+
+@app.get("/stats/batching")
+async def batching_stats():
+    """Per-model batch-size and queue-wait histograms"""
+    return dispatchers.stats()
+
+@app.get("/stats/execution")
+async def execution_stats():
+    """Per-model queue depth, in-flight work and wait/run histograms"""
+    return model_executor.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+def require_operator(token: Optional[str]):
+    if not PROFILING_CONFIG["enabled"]:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not is_operator(token, PROFILING_CONFIG["token"]):
+        raise HTTPException(status_code=403, detail="Operator token required")
+
+@app.get("/profiles")
+async def list_profiles(x_operator_token: Optional[str] = Header(None)):
+    """Stored request profiles, newest first"""
+    require_operator(x_operator_token)
+    return {"profiles": profile_store.list()}
+
+@app.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_operator_token: Optional[str] = Header(None)):
+    """Collapsed-stack profile (flamegraph.pl / speedscope input)"""
+    require_operator(x_operator_token)
+    profile = profile_store.load(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile)
+
+@app.get("/stats/event-loop")
+async def event_loop_stats():
+    """Event-loop lag percentiles and recent stalls with the stack that blocked the loop"""
+    return loop_monitor.stats()
+
+@app.get("/stats/admission")
+async def admission_stats():
+    """Per-cost-class in-flight, queued, admitted and rejected counts"""
+    return admission_controller.stats()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -2,7 +2,6 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import joblib
 import numpy as np
-import pandas as pd
 from pathlib import Path
 from typing import List, Optional
 import sys
@@ -11,19 +10,34 @@ import os
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from schemas.air_quality import AQIPredictionRequest, AQIPredictionResponse, LocationAQIRequest, LocationAQIResponse
+from schemas.air_quality import (
+    AQIPredictionRequest, AQIPredictionResponse, LocationAQIRequest, LocationAQIResponse,
+    AQIBatchPredictionRequest, AQIBatchPredictionResponse
+)
+from services.feature_template import feature_templates, REQUEST_FIELDS
+from services.inference_dispatcher import dispatchers
+from services.executor import model_executor
+from services.model_manager import model_manager
+from services.tree_ensemble import compile_for_serving
+from utils.constants import API_CONFIG
+from utils.metrics import time_model_phase, timed_model_phase
 
 router = APIRouter()
 
 # Global model variable
 xgb_model = None
 
+# "compiled" serves small inputs from a flat-array tree kernel; "native" uses XGBoost only
+TREE_RUNTIME = os.getenv("TREE_RUNTIME", "compiled")
+
 def load_xgb_model():
     """Load XGBoost model"""
     global xgb_model
     try:
         model_path = Path(__file__).parent.parent.parent / "models/xgb_model.pkl"
         xgb_model = joblib.load(model_path)
+        if TREE_RUNTIME == "compiled":
+            xgb_model = compile_for_serving(xgb_model, "xgboost")
         print("✅ XGBoost model loaded successfully")
         return xgb_model
     except Exception as e:
@@ -45,46 +59,58 @@ def get_aqi_category(aqi: float) -> str:
     else:
         return "Hazardous"
 
+@timed_model_phase("xgb", "inference")
+def predict_feature_batch(feature_rows: List[np.ndarray]) -> np.ndarray:
+    """Run one XGBoost predict over stacked feature vectors"""
+    return xgb_model.predict(np.vstack(feature_rows))
+
+# Concurrent /predict and /location requests share XGBoost calls
+xgb_dispatcher = dispatchers.register("xgb", predict_feature_batch)
+
+# Upper bounds of each AQI category, used by the vectorized categorizer
+AQI_CATEGORY_BOUNDS = np.array([50, 100, 150, 200, 300], dtype=np.float64)
+AQI_CATEGORY_NAMES = np.array([
+    "Good", "Moderate", "Unhealthy for Sensitive Groups",
+    "Unhealthy", "Very Unhealthy", "Hazardous"
+], dtype=object)
+
+def get_aqi_categories(aqi: np.ndarray) -> np.ndarray:
+    """Vectorized get_aqi_category for an array of AQI values"""
+    return AQI_CATEGORY_NAMES[np.searchsorted(AQI_CATEGORY_BOUNDS, aqi, side="left")]
+
+def load_feature_template():
+    """Load serving feature template"""
+    try:
+        template = feature_templates.load()
+        print(f"✅ Feature template loaded ({template.n_features} features, {template.source})")
+        return template
+    except Exception as e:
+        print(f"❌ Error loading feature template: {e}")
+        return None
+
+@timed_model_phase("xgb", "features")
 def create_feature_vector(request: AQIPredictionRequest) -> np.ndarray:
     """Create feature vector for prediction"""
-    # Load training data for reference
-    training_data_path = Path(__file__).parent.parent.parent / "data/ml_ready/enhanced_training_dataset.csv"
-    training_data = pd.read_csv(training_data_path, low_memory=False)
-    
-    numeric_cols = training_data.select_dtypes(include=['number']).columns.tolist()
-    feature_cols = [col for col in numeric_cols if col not in ['AQI']]
-    features = np.zeros(len(feature_cols))
-    
-    # Map request data to features
-    feature_mapping = {
-        'main.temp': request.temperature,
-        'main.humidity': request.humidity,
-        'main.pressure': request.pressure,
-        'wind.speed': request.wind_speed
-    }
-    
-    for i, col in enumerate(feature_cols):
-        if col in feature_mapping:
-            features[i] = feature_mapping[col]
-        elif 'pm25' in col.lower():
-            features[i] = request.pm25
-        elif 'o3' in col.lower():
-            features[i] = request.o3
-        else:
-            # Use median value from training data
-            features[i] = training_data[col].median()
-    
-    return features
+    template = feature_templates.get()
+    return template.create_vector({
+        'temperature': request.temperature,
+        'humidity': request.humidity,
+        'pressure': request.pressure,
+        'wind_speed': request.wind_speed,
+        'pm25': request.pm25,
+        'o3': request.o3
+    })
 
 @router.post("/predict", response_model=AQIPredictionResponse)
 async def predict_aqi(request: AQIPredictionRequest):
     """Predict AQI based on weather and pollution data"""
+    await model_manager.ensure_loaded("xgb")
     if xgb_model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
     try:
         features = create_feature_vector(request)
-        aqi_pred = xgb_model.predict([features])[0]
+        aqi_pred = await xgb_dispatcher.submit(features)
         category = get_aqi_category(aqi_pred)
         
         return AQIPredictionResponse(
@@ -100,9 +126,49 @@ async def predict_aqi(request: AQIPredictionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+def predict_aqi_columns(columns: dict):
+    """Predict AQI for columnar inputs with a single model call"""
+    with time_model_phase("xgb", "features"):
+        features = feature_templates.get().create_matrix(columns)
+    with time_model_phase("xgb", "inference"):
+        aqi_pred = np.asarray(xgb_model.predict(features), dtype=np.float64)
+    return aqi_pred, get_aqi_categories(aqi_pred)
+
+@router.post("/predict/batch", response_model=AQIBatchPredictionResponse)
+async def predict_aqi_batch(request: AQIBatchPredictionRequest):
+    """Predict AQI for many inputs (e.g. map grid cells) in one pass"""
+    await model_manager.ensure_loaded("xgb")
+    if xgb_model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    if request.columns is not None:
+        columns = {field: np.asarray(getattr(request.columns, field), dtype=np.float64) for field in REQUEST_FIELDS}
+    else:
+        columns = {
+            field: np.fromiter((getattr(row, field) for row in request.inputs), dtype=np.float64, count=len(request.inputs))
+            for field in REQUEST_FIELDS
+        }
+    
+    count = len(columns[REQUEST_FIELDS[0]])
+    if count > API_CONFIG["max_batch_size"]:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds {API_CONFIG['max_batch_size']}")
+    if count == 0:
+        return AQIBatchPredictionResponse(count=0, aqi=[], category=[])
+    
+    try:
+        aqi_pred, categories = await model_executor.run("xgb", predict_aqi_columns, columns)
+        return AQIBatchPredictionResponse(
+            count=count,
+            aqi=np.round(aqi_pred, 1).tolist(),
+            category=categories.tolist()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
 @router.post("/location", response_model=LocationAQIResponse)
 async def get_location_aqi(request: LocationAQIRequest):
     """Get AQI for a specific location with current weather"""
+    await model_manager.ensure_loaded("xgb")
     if xgb_model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
@@ -118,7 +184,7 @@ async def get_location_aqi(request: LocationAQIRequest):
         )
         
         features = create_feature_vector(aqi_request)
-        aqi_pred = xgb_model.predict([features])[0]
+        aqi_pred = await xgb_dispatcher.submit(features)
         category = get_aqi_category(aqi_pred)
         
         return LocationAQIResponse(
@@ -3,20 +3,42 @@ from typing import List, Dict, Optional
 import datetime
 from pathlib import Path
 import sys
+import os
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from schemas.alerts import (
     AlertRequest, AlertResponse, AlertSubscriptionRequest,
-    AlertThresholdsResponse, AlertCheckRequest, AlertCheckResponse
+    AlertThresholdsResponse, AlertCheckRequest, AlertCheckResponse,
+    AlertReadingRequest, AlertReadingResponse, AlertNotification
 )
+from services.alert_subscriptions import AlertSubscriptionRegistry, create_subscription_registry
+from services.executor import model_executor
+from services.tree_ensemble import compile_for_serving
 
 router = APIRouter()
 
 # Global model variable
 rf_model = None
 
+# "compiled" serves small inputs from a flat-array tree kernel; "native" uses scikit-learn only
+TREE_RUNTIME = os.getenv("TREE_RUNTIME", "compiled")
+
+# Subscription registry (SQLite by default, see ALERT_STORE), opened on first use
+subscription_registry: Optional[AlertSubscriptionRegistry] = None
+
+def get_subscription_registry() -> AlertSubscriptionRegistry:
+    """Get the shared subscription registry, creating it on first use"""
+    global subscription_registry
+    if subscription_registry is None:
+        subscription_registry = create_subscription_registry()
+    return subscription_registry
+
+async def run_registry(method: str, *args):
+    """Run a registry call (and the initial load of all subscriptions) off the event loop"""
+    return await model_executor.run("alert_store", lambda: getattr(get_subscription_registry(), method)(*args))
+
 def load_rf_model():
     """Load Random Forest model for alerts"""
     global rf_model
@@ -24,6 +46,8 @@ def load_rf_model():
         import joblib
         model_path = Path(__file__).parent.parent.parent / "models/metadata_model.pkl"
         rf_model = joblib.load(model_path)
+        if TREE_RUNTIME == "compiled":
+            rf_model = compile_for_serving(rf_model, "random_forest")
         print("✅ Random Forest model loaded successfully")
         return rf_model
     except Exception as e:
@@ -209,16 +233,69 @@ async def check_air_quality_alerts(request: AlertCheckRequest):
 @router.post("/subscribe")
 async def subscribe_to_alerts(request: AlertSubscriptionRequest):
     """Subscribe to air quality alerts"""
-    # This would integrate with a notification system
+    try:
+        subscription_id = await run_registry(
+            "subscribe", request.user_id, request.location, request.health_condition, request.alert_threshold
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Subscription error: {str(e)}")
+    
     return {
         "user_id": request.user_id,
         "location": request.location,
         "health_condition": request.health_condition,
         "alert_threshold": request.alert_threshold,
         "subscribed": True,
-        "subscription_id": f"sub_{request.user_id}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        "subscription_id": subscription_id
     }
 
+@router.get("/subscriptions/{subscription_id}")
+async def get_alert_subscription(subscription_id: str):
+    """Get an alert subscription"""
+    subscription = await run_registry("get", subscription_id)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    return subscription
+
+@router.delete("/subscriptions/{subscription_id}")
+async def unsubscribe_from_alerts(subscription_id: str):
+    """Cancel an alert subscription"""
+    if not await run_registry("unsubscribe", subscription_id):
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    return {"subscription_id": subscription_id, "subscribed": False}
+
+@router.post("/readings", response_model=AlertReadingResponse)
+async def evaluate_alert_reading(request: AlertReadingRequest):
+    """Find every subscriber a new AQI reading triggers at its location"""
+    try:
+        triggered = await run_registry("evaluate", request.location, request.aqi)
+        
+        # Messages only vary by health condition, so build each once
+        messages = {}
+        notifications = []
+        for subscription_id, user_id, condition, threshold in triggered:
+            if condition not in messages:
+                messages[condition] = get_alert_message(request.aqi, condition, request.pollen_level)
+            notifications.append(AlertNotification(
+                subscription_id=subscription_id,
+                user_id=user_id,
+                health_condition=condition,
+                alert_threshold=threshold,
+                message=messages[condition]
+            ))
+        
+        return AlertReadingResponse(
+            location=request.location,
+            aqi=request.aqi,
+            alert_level=get_alert_level(request.aqi),
+            aqi_category=get_aqi_category(request.aqi),
+            triggered=len(notifications),
+            notifications=notifications,
+            timestamp=datetime.datetime.now().isoformat()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Alert evaluation error: {str(e)}")
+
 @router.get("/thresholds", response_model=AlertThresholdsResponse)
 async def get_alert_thresholds():
     """Get air quality alert thresholds"""
@@ -2,52 +2,57 @@ from fastapi import APIRouter, HTTPException
 from typing import Dict, List, Optional
 from pydantic import BaseModel
 import datetime
+import heapq
+import numpy as np
 
 from schemas.carbon import (
     CarbonCalculationRequest, CarbonCalculationResponse,
     CarbonTrackingRequest, CarbonTrackingResponse,
-    CarbonHistoryResponse, CarbonUpdateRequest
+    CarbonHistoryResponse, CarbonUpdateRequest, CarbonSummaryResponse, CarbonPercentileResponse,
+    CarbonBatchCalculationRequest, CarbonBatchCalculationResponse, CARBON_INPUT_RANGES,
+    CarbonScenarioRange, CarbonScenarioRequest, CarbonScenarioResponse, CarbonScenario
 )
+from services.carbon_store import CarbonStore, BREAKDOWN_FIELDS, create_carbon_store
+from services.emission_factors import EmissionFactorTable, lifestyle_activities, load_emission_factors
+from services.executor import model_executor
+from utils.constants import API_CONFIG
 
 router = APIRouter()
 
-# In-memory storage for demo (use database in production)
-carbon_data = {}
+# History storage backend (SQLite by default, see CARBON_STORE), opened on first use
+carbon_store: Optional[CarbonStore] = None
 
-def calculate_transportation_co2(daily_miles: float, public_transit_usage: float, 
-                                electric_vehicle_usage: float = 0.0) -> float:
-    """Calculate daily transportation CO2 emissions in kg"""
-    # Gasoline car: ~0.4 kg CO2 per mile
-    # Public transit: ~0.1 kg CO2 per mile
-    # Electric vehicle: ~0.05 kg CO2 per mile
-    
-    gas_miles = daily_miles * (1 - public_transit_usage - electric_vehicle_usage)
-    transit_miles = daily_miles * public_transit_usage
-    ev_miles = daily_miles * electric_vehicle_usage
-    
-    co2 = (gas_miles * 0.4) + (transit_miles * 0.1) + (ev_miles * 0.05)
-    return round(co2, 2)
+def get_carbon_store() -> CarbonStore:
+    """Get the shared history store, creating it on first use"""
+    global carbon_store
+    if carbon_store is None:
+        carbon_store = create_carbon_store()
+    return carbon_store
 
-def calculate_food_co2(meat_consumption: float, dairy_consumption: float, 
-                      vegetable_consumption: float) -> float:
-    """Calculate daily food CO2 emissions in kg"""
-    # Meat: ~25 kg CO2 per kg
-    # Dairy: ~10 kg CO2 per kg  
-    # Vegetables: ~2 kg CO2 per kg
-    
-    co2 = (meat_consumption * 25) + (dairy_consumption * 10) + (vegetable_consumption * 2)
-    return round(co2, 2)
+# Emission factor table (newest version unless EMISSION_FACTORS_VERSION pins one), loaded on first use
+emission_factors: Optional[EmissionFactorTable] = None
 
-def calculate_consumer_co2(electronics_purchases: float, clothing_purchases: float,
-                          furniture_purchases: float) -> float:
-    """Calculate monthly consumer CO2 emissions in kg (converted to daily)"""
-    # Electronics: ~200 kg CO2 per purchase
-    # Clothing: ~50 kg CO2 per purchase
-    # Furniture: ~300 kg CO2 per purchase
-    
-    monthly_co2 = (electronics_purchases * 200) + (clothing_purchases * 50) + (furniture_purchases * 300)
-    daily_co2 = monthly_co2 / 30  # Convert to daily
-    return round(daily_co2, 2)
+def get_emission_factors() -> EmissionFactorTable:
+    """Get the shared emission factor table, loading it on first use"""
+    global emission_factors
+    if emission_factors is None:
+        emission_factors = load_emission_factors()
+        print(f"✅ Emission factors {emission_factors.version} loaded ({len(emission_factors.activities)} activities)")
+    return emission_factors
+
+async def run_store(method: str, *args):
+    """Run a store call off the event loop"""
+    store = get_carbon_store()
+    return await model_executor.run("carbon_store", getattr(store, method), *args)
+
+def build_history_entry(calculation: CarbonCalculationResponse) -> Dict:
+    """History entry for a calculated footprint, dated now"""
+    return {
+        "date": datetime.datetime.now().isoformat(),
+        "total_daily_co2": calculation.total_daily_co2,
+        "category": calculation.category,
+        "breakdown": calculation.breakdown
+    }
 
 def get_carbon_category(total_daily_co2: float) -> str:
     """Categorize carbon footprint"""
@@ -60,45 +65,196 @@ def get_carbon_category(total_daily_co2: float) -> str:
     else:
         return "Very High"
 
+# Upper bounds of each carbon category, used by the vectorized categorizer
+CARBON_CATEGORY_BOUNDS = np.array([20, 40, 60], dtype=np.float64)
+CARBON_CATEGORY_NAMES = np.array(["Low", "Medium", "High", "Very High"], dtype=object)
+
+def get_carbon_categories(total_daily_co2: np.ndarray) -> np.ndarray:
+    """Vectorized get_carbon_category for an array of daily totals"""
+    return CARBON_CATEGORY_NAMES[np.searchsorted(CARBON_CATEGORY_BOUNDS, total_daily_co2, side="right")]
+
+def calculate_carbon_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Score many people at once from columnar inputs with the current emission factor table"""
+    n_rows = len(columns["daily_miles"])
+    components = get_emission_factors().evaluate(lifestyle_activities(columns))
+    breakdown = {field: components.get(field, np.zeros(n_rows)) for field in BREAKDOWN_FIELDS}
+    total = sum(breakdown.values())
+    
+    return {
+        "total_daily_co2": total,
+        "category": get_carbon_categories(total),
+        **breakdown
+    }
+
+def calculate_carbon_row(inputs: Dict[str, float]) -> Dict[str, float]:
+    """Breakdown for one person's inputs with the current emission factor table"""
+    components = get_emission_factors().evaluate_row(lifestyle_activities(inputs))
+    return {field: components.get(field, 0.0) for field in BREAKDOWN_FIELDS}
+
 @router.post("/calculate", response_model=CarbonCalculationResponse)
 async def calculate_carbon_footprint(request: CarbonCalculationRequest):
     """Calculate carbon footprint based on lifestyle data"""
     try:
-        # Calculate each component
-        transport_co2 = calculate_transportation_co2(
-            request.daily_miles, 
-            request.public_transit_usage,
-            request.electric_vehicle_usage
-        )
-        
-        food_co2 = calculate_food_co2(
-            request.meat_consumption,
-            request.dairy_consumption,
-            request.vegetable_consumption
-        )
-        
-        consumer_co2 = calculate_consumer_co2(
-            request.electronics_purchases,
-            request.clothing_purchases,
-            request.furniture_purchases
-        )
-        
-        total_daily_co2 = transport_co2 + food_co2 + consumer_co2
+        breakdown = calculate_carbon_row({field: getattr(request, field) for field in CARBON_INPUT_RANGES})
+        total_daily_co2 = sum(breakdown.values())
         category = get_carbon_category(total_daily_co2)
         
         return CarbonCalculationResponse(
             total_daily_co2=total_daily_co2,
             category=category,
-            breakdown={
-                "transportation": transport_co2,
-                "food": food_co2,
-                "consumer": consumer_co2
-            },
-            recommendations=get_carbon_recommendations(total_daily_co2, category)
+            breakdown=breakdown,
+            recommendations=get_carbon_recommendations(total_daily_co2, category),
+            factor_version=get_emission_factors().version
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Calculation error: {str(e)}")
 
+@router.post("/calculate/batch", response_model=CarbonBatchCalculationResponse)
+async def calculate_carbon_footprint_batch(request: CarbonBatchCalculationRequest):
+    """Calculate carbon footprints for many people (e.g. survey rows) in one pass"""
+    if request.columns is not None:
+        columns = {field: np.asarray(getattr(request.columns, field), dtype=np.float64) for field in CARBON_INPUT_RANGES}
+    else:
+        columns = {
+            field: np.fromiter((getattr(row, field) for row in request.inputs), dtype=np.float64, count=len(request.inputs))
+            for field in CARBON_INPUT_RANGES
+        }
+    
+    count = len(columns["daily_miles"])
+    if count > API_CONFIG["max_carbon_batch_size"]:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds {API_CONFIG['max_carbon_batch_size']}")
+    
+    try:
+        result = await model_executor.run("carbon", calculate_carbon_columns, columns)
+        categories = result["category"]
+        return CarbonBatchCalculationResponse(
+            count=count,
+            total_daily_co2=result["total_daily_co2"].tolist(),
+            category=categories.tolist(),
+            breakdown={field: result[field].tolist() for field in BREAKDOWN_FIELDS},
+            recommendations={
+                category: get_carbon_recommendations(float(result["total_daily_co2"][categories == category].mean()), category)
+                for category in CARBON_CATEGORY_NAMES if np.any(categories == category)
+            },
+            factor_version=get_emission_factors().version
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch calculation error: {str(e)}")
+
+@router.get("/factors")
+async def get_emission_factor_table():
+    """Emission factor table version and factors used for calculations"""
+    try:
+        return get_emission_factors().info()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Emission factors error: {str(e)}")
+
+def scenario_axis_size(spec: CarbonScenarioRange) -> int:
+    """Number of values from start to stop (inclusive) in steps"""
+    return int(np.floor((spec.stop - spec.start) / spec.step + 1e-9)) + 1
+
+def scenario_grid_points(ranges: Dict[str, CarbonScenarioRange]) -> float:
+    """Grid size as a float, so a tiny step gives inf instead of overflowing int()"""
+    with np.errstate(over="ignore", divide="ignore"):
+        return float(np.prod([
+            np.floor(np.float64(spec.stop - spec.start) / spec.step + 1e-9) + 1 for spec in ranges.values()
+        ]))
+
+def scenario_axis(spec: CarbonScenarioRange) -> np.ndarray:
+    """Values from start to stop (inclusive) in steps, rounded to absorb float drift"""
+    return np.round(spec.start + spec.step * np.arange(scenario_axis_size(spec)), 6)
+
+def evaluate_scenarios(base: Dict[str, float], axes: Dict[str, np.ndarray], top_k: int) -> Dict:
+    """Score the Cartesian grid of axes around a base profile and rank the top_k lowest totals"""
+    grids = np.meshgrid(*axes.values(), indexing="ij")
+    varied = {name: grid.ravel() for name, grid in zip(axes, grids)}
+    n_points = grids[0].size
+    columns = {
+        field: varied[field] if field in varied else np.full(n_points, base[field])
+        for field in CARBON_INPUT_RANGES
+    }
+    
+    # Transit and EV shares of the same miles above 1 would mean negative gasoline miles
+    feasible = columns["public_transit_usage"] + columns["electric_vehicle_usage"] <= 1 + 1e-9
+    if not feasible.all():
+        columns = {field: values[feasible] for field, values in columns.items()}
+        varied = {name: columns[name] for name in varied}
+    
+    # The base profile is scored as row 0 of the same call, so a grid point equal to it saves exactly 0
+    scored = calculate_carbon_columns({
+        field: np.concatenate([[base[field]], values]) for field, values in columns.items()
+    })
+    baseline = {field: float(scored[field][0]) for field in BREAKDOWN_FIELDS}
+    result = {field: values[1:] for field, values in scored.items()}
+    totals = result["total_daily_co2"].tolist()
+    # (total, index) pairs keep the ranking stable when totals tie
+    top = [index for _, index in heapq.nsmallest(top_k, zip(totals, range(len(totals))))]
+    
+    return {
+        "varied": varied,
+        "baseline": baseline,
+        "result": result,
+        "top": top,
+        "count": len(totals),
+        "skipped": n_points - len(totals)
+    }
+
+def build_scenario(inputs: Dict[str, float], breakdown: Dict[str, float], baseline_total: float) -> CarbonScenario:
+    """Scenario entry with its category and saving against the base profile"""
+    total = sum(breakdown.values())
+    return CarbonScenario(
+        inputs=inputs,
+        total_daily_co2=round(total, 2),
+        category=get_carbon_category(total),
+        breakdown=breakdown,
+        reduction=round(baseline_total - total, 2)
+    )
+
+@router.post("/scenarios", response_model=CarbonScenarioResponse)
+async def simulate_carbon_scenarios(request: CarbonScenarioRequest):
+    """Evaluate what-if changes to a profile over a grid of input values in one pass"""
+    n_scenarios = scenario_grid_points(request.ranges)
+    # Written as "not <=" so an infinite or NaN size is rejected too
+    if not n_scenarios <= API_CONFIG["max_carbon_scenarios"]:
+        raise HTTPException(status_code=413, detail=f"Scenario grid exceeds {API_CONFIG['max_carbon_scenarios']} points")
+    
+    try:
+        base = {field: getattr(request.base, field) for field in CARBON_INPUT_RANGES}
+        axes = {name: scenario_axis(spec) for name, spec in request.ranges.items()}
+        scenarios = await model_executor.run("carbon", evaluate_scenarios, base, axes, request.top_k)
+        
+        baseline_breakdown = scenarios["baseline"]
+        baseline_total = sum(baseline_breakdown.values())
+        varied, result = scenarios["varied"], scenarios["result"]
+        top = [
+            build_scenario(
+                {name: float(values[i]) for name, values in varied.items()},
+                {field: float(result[field][i]) for field in BREAKDOWN_FIELDS},
+                baseline_total
+            )
+            for i in scenarios["top"]
+        ]
+        
+        grid = None
+        if request.include_grid:
+            grid = {
+                **{name: values.tolist() for name, values in varied.items()},
+                "total_daily_co2": result["total_daily_co2"].tolist(),
+                "category": result["category"].tolist()
+            }
+        
+        return CarbonScenarioResponse(
+            baseline=build_scenario({name: base[name] for name in axes}, baseline_breakdown, baseline_total),
+            axes={name: values.tolist() for name, values in axes.items()},
+            count=scenarios["count"],
+            skipped=scenarios["skipped"],
+            top=top,
+            grid=grid,
+            factor_version=get_emission_factors().version
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scenario error: {str(e)}")
+
 @router.post("/track", response_model=CarbonTrackingResponse)
 async def track_carbon_footprint(request: CarbonTrackingRequest):
     """Track carbon footprint over time"""
@@ -118,26 +274,15 @@ async def track_carbon_footprint(request: CarbonTrackingRequest):
         
         calculation = await calculate_carbon_footprint(calc_request)
         
-        # Store in memory (use database in production)
         user_id = request.user_id
-        if user_id not in carbon_data:
-            carbon_data[user_id] = []
-        
-        entry = {
-            "date": datetime.datetime.now().isoformat(),
-            "total_daily_co2": calculation.total_daily_co2,
-            "category": calculation.category,
-            "breakdown": calculation.breakdown
-        }
-        
-        carbon_data[user_id].append(entry)
+        total_entries = await run_store("add_entry", user_id, build_history_entry(calculation))
         
         return CarbonTrackingResponse(
             user_id=user_id,
             current_footprint=calculation.total_daily_co2,
             category=calculation.category,
             tracking_started=True,
-            total_entries=len(carbon_data[user_id])
+            total_entries=total_entries
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tracking error: {str(e)}")
@@ -145,11 +290,10 @@ async def track_carbon_footprint(request: CarbonTrackingRequest):
 @router.get("/history/{user_id}", response_model=CarbonHistoryResponse)
 async def get_carbon_history(user_id: str, days: int = 30):
     """Get carbon footprint history for a user"""
-    if user_id not in carbon_data:
+    history = await run_store("history", user_id, days)  # Last N days
+    if not history and not await run_store("has_user", user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    history = carbon_data[user_id][-days:]  # Last N days
-    
     return CarbonHistoryResponse(
         user_id=user_id,
         history=history,
@@ -157,10 +301,37 @@ async def get_carbon_history(user_id: str, days: int = 30):
         average_daily_co2=round(sum(entry["total_daily_co2"] for entry in history) / len(history), 2) if history else 0
     )
 
+@router.get("/summary/{user_id}", response_model=CarbonSummaryResponse)
+async def get_carbon_summary(user_id: str):
+    """All-time and rolling 7/30/365-day totals from running aggregates"""
+    summary = await run_store("summary", user_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return CarbonSummaryResponse(user_id=user_id, **summary)
+
+@router.get("/percentile", response_model=CarbonPercentileResponse)
+async def get_carbon_percentile(user_id: Optional[str] = None, value: Optional[float] = None):
+    """Rank a user's latest footprint (or a given daily CO2 value) among all tracked footprints"""
+    if (user_id is None) == (value is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of user_id or value")
+    
+    if user_id is not None:
+        latest = await run_store("history", user_id, 1)
+        if not latest:
+            raise HTTPException(status_code=404, detail="User not found")
+        value = latest[0]["total_daily_co2"]
+    
+    rank = await run_store("percentile", value)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="No tracked footprints yet")
+    
+    return CarbonPercentileResponse(user_id=user_id, category=get_carbon_category(value), **rank)
+
 @router.put("/update/{user_id}")
 async def update_carbon_tracking(user_id: str, request: CarbonUpdateRequest):
     """Update carbon tracking data"""
-    if user_id not in carbon_data:
+    if not await run_store("has_user", user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
     # Add new entry
@@ -178,14 +349,7 @@ async def update_carbon_tracking(user_id: str, request: CarbonUpdateRequest):
     
     calculation = await calculate_carbon_footprint(calc_request)
     
-    entry = {
-        "date": datetime.datetime.now().isoformat(),
-        "total_daily_co2": calculation.total_daily_co2,
-        "category": calculation.category,
-        "breakdown": calculation.breakdown
-    }
-    
-    carbon_data[user_id].append(entry)
+    await run_store("add_entry", user_id, build_history_entry(calculation))
     
     return {
         "user_id": user_id,
@@ -1,25 +1,43 @@
 from fastapi import APIRouter, HTTPException
-import tensorflow as tf
+from fastapi.responses import StreamingResponse
 import numpy as np
-import pandas as pd
 from pathlib import Path
 from typing import List, Optional
 import sys
+import os
+import json
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from schemas.forecast import ForecastRequest, ForecastResponse, HourlyForecast
+from schemas.forecast import ForecastRequest, ForecastResponse, HourlyForecast, ForecastBatchRequest
+from services.inference_dispatcher import dispatchers
+from services.feature_template import feature_templates
+from services.executor import model_executor
+from services.model_manager import model_manager
+from services.lstm_runtime import NumpyLSTMModel, LSTM_EXPORT_PATH
+from utils.constants import API_CONFIG
+from utils.metrics import timed_model_phase
 
 router = APIRouter()
 
 # Global model variable
 lstm_model = None
 
+# "auto" serves the NumPy export when present; "keras" always loads the .h5 model
+LSTM_RUNTIME = os.getenv("LSTM_RUNTIME", "auto")
+
 def load_lstm_model():
-    """Load LSTM model"""
+    """Load LSTM model (NumPy runtime when an export exists, otherwise Keras)"""
     global lstm_model
     try:
+        if LSTM_RUNTIME != "keras" and LSTM_EXPORT_PATH.exists():
+            lstm_model = NumpyLSTMModel.load(LSTM_EXPORT_PATH)
+            print("✅ LSTM model loaded successfully (NumPy runtime)")
+            return lstm_model
+        
+        # TensorFlow is only imported when the exported artifact is missing
+        import tensorflow as tf
         model_path = Path(__file__).parent.parent.parent / "models/lstm_model.h5"
         lstm_model = tf.keras.models.load_model(model_path, compile=False)
         print("✅ LSTM model loaded successfully")
@@ -28,6 +46,18 @@ def load_lstm_model():
         print(f"❌ Error loading LSTM model: {e}")
         return None
 
+@timed_model_phase("lstm", "inference")
+def predict_sequences(sequences: np.ndarray) -> np.ndarray:
+    """Run one LSTM predict over an (N, 24, F) array"""
+    return lstm_model.predict(sequences, verbose=0)
+
+def predict_sequence_batch(sequences: List[np.ndarray]) -> np.ndarray:
+    """Run one LSTM predict over stacked (1, 24, F) sequences"""
+    return predict_sequences(np.concatenate(sequences))
+
+# Concurrent /24hour requests share LSTM calls
+lstm_dispatcher = dispatchers.register("lstm", predict_sequence_batch)
+
 def get_aqi_category(aqi: float) -> str:
     """Convert AQI to category"""
     if aqi <= 50:
@@ -43,84 +73,124 @@ def get_aqi_category(aqi: float) -> str:
     else:
         return "Hazardous"
 
-def create_forecast_sequence(request: ForecastRequest) -> np.ndarray:
+# Diurnal offsets for each forecast hour, computed once
+FORECAST_HOURS = np.arange(24)
+DIURNAL_TEMPERATURE = 5 * np.sin((FORECAST_HOURS - 6) * np.pi / 12)
+DIURNAL_HUMIDITY = 10 * np.cos((FORECAST_HOURS - 6) * np.pi / 12)
+DIURNAL_PRESSURE = 5 * np.sin(FORECAST_HOURS * np.pi / 6)
+DIURNAL_WIND_SPEED = 2 * np.sin(FORECAST_HOURS * np.pi / 12)
+
+def get_forecast_rng(request: ForecastRequest) -> np.random.Generator:
+    """Random generator for simulated variation (reproducible when request.seed is set)"""
+    return np.random.default_rng(request.seed)
+
+@timed_model_phase("lstm", "features")
+def create_forecast_sequence(request: ForecastRequest, rng: Optional[np.random.Generator] = None) -> np.ndarray:
     """Create 24-hour sequence for LSTM prediction"""
-    # Load training data for reference
-    training_data_path = Path(__file__).parent.parent.parent / "data/ml_ready/enhanced_training_dataset.csv"
-    training_data = pd.read_csv(training_data_path, low_memory=False)
+    template = feature_templates.get()
+    rng = rng if rng is not None else get_forecast_rng(request)
     
-    numeric_cols = training_data.select_dtypes(include=['number']).columns.tolist()
-    feature_cols = [col for col in numeric_cols if col not in ['AQI']]
+    # Start every hour from the median defaults, then overwrite mapped columns
+    sequence = np.empty((24, template.n_features), dtype=np.float64)
+    sequence[:] = template.defaults
     
-    # Create 24-hour sequence
-    sequence = np.zeros((24, len(feature_cols)))
+    hourly_values = {
+        'temperature': request.base_temperature + DIURNAL_TEMPERATURE,
+        'humidity': request.base_humidity + DIURNAL_HUMIDITY,
+        'pressure': request.base_pressure + DIURNAL_PRESSURE,
+        'wind_speed': request.base_wind_speed + DIURNAL_WIND_SPEED
+    }
+    for field, values in hourly_values.items():
+        indices = template.field_index.get(field)
+        if indices is not None:
+            sequence[:, indices] = values[:, None]
     
-    for hour in range(24):
-        # Simulate daily patterns
-        temp = request.base_temperature + 5 * np.sin((hour - 6) * np.pi / 12)
-        humidity = request.base_humidity + 10 * np.cos((hour - 6) * np.pi / 12)
-        pressure = request.base_pressure + 5 * np.sin(hour * np.pi / 6)
-        wind_speed = request.base_wind_speed + np.sin(hour * np.pi / 12) * 2
-        
-        # Map to features
-        feature_mapping = {
-            'main.temp': temp,
-            'main.humidity': humidity,
-            'main.pressure': pressure,
-            'wind.speed': wind_speed
-        }
-        
-        for i, col in enumerate(feature_cols):
-            if col in feature_mapping:
-                sequence[hour, i] = feature_mapping[col]
-            elif 'pm25' in col.lower():
-                sequence[hour, i] = request.base_pm25 + np.random.random() * 10
-            elif 'o3' in col.lower():
-                sequence[hour, i] = request.base_o3 + np.random.random() * 15
-            else:
-                sequence[hour, i] = training_data[col].median()
+    # Pollutant columns get independent noise per hour and column
+    for field, base, spread in (('pm25', request.base_pm25, 10), ('o3', request.base_o3, 15)):
+        indices = template.field_index.get(field)
+        if indices is not None:
+            sequence[:, indices] = base + rng.random((24, len(indices))) * spread
     
     return sequence.reshape(1, 24, -1)
 
+def build_forecast_response(request: ForecastRequest, forecast_value: float,
+                            rng: np.random.Generator) -> ForecastResponse:
+    """Expand one LSTM output into hourly forecasts with simulated variation"""
+    hourly_aqi = np.maximum(0, forecast_value + rng.random(24) * 10 - 5)
+    temperatures = request.base_temperature + DIURNAL_TEMPERATURE
+    humidities = request.base_humidity + DIURNAL_HUMIDITY
+    
+    hourly_forecasts = [
+        HourlyForecast(
+            hour=hour,
+            aqi=round(float(hourly_aqi[hour]), 1),
+            category=get_aqi_category(hourly_aqi[hour]),
+            temperature=float(temperatures[hour]),
+            humidity=float(humidities[hour])
+        )
+        for hour in range(24)
+    ]
+    
+    return ForecastResponse(
+        location=request.location,
+        forecast_hours=24,
+        hourly_forecasts=hourly_forecasts,
+        average_aqi=round(np.mean([f.aqi for f in hourly_forecasts]), 1),
+        max_aqi=round(max([f.aqi for f in hourly_forecasts]), 1),
+        min_aqi=round(min([f.aqi for f in hourly_forecasts]), 1)
+    )
+
 @router.post("/24hour", response_model=ForecastResponse)
 async def get_24hour_forecast(request: ForecastRequest):
     """Get 24-hour air quality forecast"""
+    await model_manager.ensure_loaded("lstm")
     if lstm_model is None:
         raise HTTPException(status_code=500, detail="LSTM model not loaded")
     
     try:
-        # Create forecast sequence
-        sequence = create_forecast_sequence(request)
+        rng = get_forecast_rng(request)
+        sequence = create_forecast_sequence(request, rng)
         
         # Make prediction
-        forecast = lstm_model.predict(sequence, verbose=0)
-        
-        # Generate hourly forecasts
-        hourly_forecasts = []
-        for hour in range(24):
-            # Use forecast value or simulate variation
-            aqi = forecast[0][0] + np.random.random() * 10 - 5  # Add some variation
-            aqi = max(0, aqi)  # Ensure non-negative
-            
-            hourly_forecasts.append(HourlyForecast(
-                hour=hour,
-                aqi=round(aqi, 1),
-                category=get_aqi_category(aqi),
-                temperature=request.base_temperature + 5 * np.sin((hour - 6) * np.pi / 12),
-                humidity=request.base_humidity + 10 * np.cos((hour - 6) * np.pi / 12)
-            ))
+        forecast = await lstm_dispatcher.submit(sequence)
         
-        return ForecastResponse(
-            location=request.location,
-            forecast_hours=24,
-            hourly_forecasts=hourly_forecasts,
-            average_aqi=round(np.mean([f.aqi for f in hourly_forecasts]), 1),
-            max_aqi=round(max([f.aqi for f in hourly_forecasts]), 1),
-            min_aqi=round(min([f.aqi for f in hourly_forecasts]), 1)
-        )
+        return build_forecast_response(request, float(forecast[0]), rng)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Forecast error: {str(e)}")
 
+@router.post("/24hour/batch")
+async def get_24hour_forecast_batch(request: ForecastBatchRequest):
+    """Get 24-hour forecasts for many locations, streamed as NDJSON (one location per line)"""
+    await model_manager.ensure_loaded("lstm")
+    if lstm_model is None:
+        raise HTTPException(status_code=500, detail="LSTM model not loaded")
+    if len(request.requests) > API_CONFIG["max_batch_size"]:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds {API_CONFIG['max_batch_size']}")
+    
+    def forecast_chunk(items: List[ForecastRequest]):
+        """Build the chunk's sequences and predict them (runs on the lstm lane, off the event loop)"""
+        rngs = [get_forecast_rng(item) for item in items]
+        sequences = np.concatenate([create_forecast_sequence(item, rng) for item, rng in zip(items, rngs)])
+        return predict_sequences(sequences), rngs
+    
+    async def stream_forecasts():
+        # Predict in large chunks so the first lines go out before the whole batch is done
+        chunk = API_CONFIG["forecast_stream_chunk"]
+        for start in range(0, len(request.requests), chunk):
+            items = request.requests[start:start + chunk]
+            try:
+                forecast, rngs = await model_executor.run("lstm", forecast_chunk, items)
+            except Exception as e:
+                for item in items:
+                    yield json.dumps({"location": item.location, "error": f"Forecast error: {str(e)}"}) + "\n"
+                continue
+            
+            for offset, item in enumerate(items):
+                response = build_forecast_response(item, float(forecast[offset][0]), rngs[offset])
+                yield response.model_dump_json() + "\n"
+    
+    return StreamingResponse(stream_forecasts(), media_type="application/x-ndjson")
+
 @router.get("/24hour/{location}")
 async def get_location_forecast(location: str):
     """Get 24-hour forecast for a specific location"""
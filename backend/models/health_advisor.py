@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from transformers import GPT2Tokenizer, GPT2LMHeadModel
-import torch
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import sys
+import os
+import json
+import time
+import queue
+import asyncio
+import threading
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
@@ -13,22 +18,58 @@ from schemas.health import (
     HealthConditionResponse,
     PersonalizedHealthRequest, PersonalizedHealthResponse
 )
+from services.executor import model_executor
+from services.inference_dispatcher import dispatchers
+from services.model_manager import model_manager
+from services.gpt_quantization import quantize_dynamic_int8
+from services.advice_bank import AdviceBank, ADVICE_BANK_PATH
+from utils.metrics import Histogram, LATENCY_BUCKETS_MS, time_model_phase
 
 router = APIRouter()
 
 # Global model variables
 gpt_tokenizer = None
 gpt_model = None
+advice_bank = None
 
-def load_gpt_model():
+# Per-request streaming metrics
+streaming_metrics = {
+    "ttft_ms": Histogram(LATENCY_BUCKETS_MS),
+    "tokens_per_sec": Histogram([1, 2, 5, 10, 20, 50, 100, 200])
+}
+
+# "bank" answers from the pre-generated advice bank when it covers the input; "live" always generates
+ADVICE_MODE = os.getenv("HEALTH_ADVICE_MODE", "bank")
+
+# "fp32" serves the fine-tuned weights as trained; "int8" applies dynamic quantization for CPU serving
+GPT_PRECISION = os.getenv("GPT_PRECISION", "fp32")
+
+# Latency budget for live generation; requests can override it with an X-Advice-Deadline-Ms header (0 disables)
+ADVICE_DEADLINE_MS = float(os.getenv("HEALTH_ADVICE_DEADLINE_MS", "2000"))
+
+# How long a stream reader thread waits for the next token before re-checking the generation
+STREAM_POLL_S = 1.0
+
+# Which path answered each non-streamed request
+advice_sources = {"bank": 0, "model": 0, "fallback": 0, "deadline": 0}
+
+def load_gpt_model(precision: Optional[str] = None):
     """Load GPT-2 model for health recommendations"""
     global gpt_tokenizer, gpt_model
+    precision = precision or GPT_PRECISION
     try:
+        # Deferred so importing this router doesn't pull in torch/transformers
+        from transformers import GPT2Tokenizer, GPT2LMHeadModel
         model_path = Path(__file__).parent.parent.parent / "models/gpt_text_model"
-        gpt_tokenizer = GPT2Tokenizer.from_pretrained(model_path)
-        gpt_model = GPT2LMHeadModel.from_pretrained(model_path)
-        gpt_tokenizer.pad_token = gpt_tokenizer.eos_token
-        print("✅ GPT-2 model loaded successfully")
+        tokenizer = GPT2Tokenizer.from_pretrained(model_path)
+        model = GPT2LMHeadModel.from_pretrained(model_path)
+        tokenizer.pad_token = tokenizer.eos_token
+        # Decoder-only models continue from the last position, so batched prompts are padded on the left
+        tokenizer.padding_side = "left"
+        if precision == "int8":
+            model = quantize_dynamic_int8(model)
+        gpt_tokenizer, gpt_model = tokenizer, model.eval()
+        print(f"✅ GPT-2 model loaded successfully ({precision})")
         return gpt_model, gpt_tokenizer
     except Exception as e:
         print(f"❌ Error loading GPT-2 model: {e}")
@@ -49,16 +90,111 @@ def get_aqi_category(aqi: float) -> str:
     else:
         return "Hazardous"
 
-def generate_health_recommendation(condition: str, aqi: float, pollen_level: int) -> str:
-    """Generate health recommendation using GPT-2 model"""
+def build_prompt(condition: str, aqi: float, pollen_level: int) -> str:
+    """GPT-2 prompt for a recommendation"""
+    return f"Air Quality Health Recommendations for {condition} patients with AQI {aqi} and pollen level {pollen_level}:"
+
+def generate_health_recommendations(condition: str, aqi: float, pollen_level: int, n: int = 1) -> List[str]:
+    """Sample n recommendations from the GPT-2 model (raises if the model is unavailable)"""
     if gpt_model is None or gpt_tokenizer is None:
-        return get_fallback_recommendation(condition, aqi, pollen_level)
+        raise RuntimeError("GPT-2 model not loaded")
+    
+    import torch
+    prompt = build_prompt(condition, aqi, pollen_level)
+    
+    inputs = gpt_tokenizer.encode(prompt, return_tensors="pt", max_length=100, truncation=True)
+    
+    with torch.no_grad():
+        outputs = gpt_model.generate(
+            inputs,
+            max_length=inputs.shape[1] + 50,
+            num_return_sequences=n,
+            temperature=0.7,
+            do_sample=True,
+            pad_token_id=gpt_tokenizer.eos_token_id
+        )
     
+    return [
+        gpt_tokenizer.decode(output, skip_special_tokens=True)[len(prompt):].strip()
+        for output in outputs
+    ]
+
+def deadline_stopping_criteria(deadline: float):
+    """Stopping criteria that ends generation once time.monotonic() passes deadline"""
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class DeadlineCriteria(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs) -> bool:
+            return time.monotonic() >= deadline
+
+    return StoppingCriteriaList([DeadlineCriteria()])
+
+def event_stopping_criteria(stop: threading.Event):
+    """Stopping criteria that ends generation once stop is set (e.g. the client went away)"""
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class EventCriteria(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs) -> bool:
+            return stop.is_set()
+
+    return StoppingCriteriaList([EventCriteria()])
+
+def generate_recommendation_batch(items: List[tuple]) -> List[Optional[str]]:
+    """Generate one recommendation per (condition, aqi, pollen_level, deadline) item with a single padded generate call.
+
+    deadline is a time.monotonic() value or None; generation stops once every
+    caller's deadline has passed. Items that could not be generated get None.
+    """
+    if gpt_model is None or gpt_tokenizer is None:
+        return [None] * len(items)
+    
+    import torch
+    prompts = [build_prompt(condition, aqi, pollen_level) for condition, aqi, pollen_level, _ in items]
+    deadlines = [deadline for *_, deadline in items]
+    stopping_criteria = None if None in deadlines else deadline_stopping_criteria(max(deadlines))
     try:
-        prompt = f"Air Quality Health Recommendations for {condition} patients with AQI {aqi} and pollen level {pollen_level}:"
+        with time_model_phase("gpt", "features"):
+            inputs = gpt_tokenizer(prompts, return_tensors="pt", padding=True, max_length=100, truncation=True)
+        prompt_length = inputs["input_ids"].shape[1]
         
-        inputs = gpt_tokenizer.encode(prompt, return_tensors="pt", max_length=100, truncation=True)
+        with torch.no_grad(), time_model_phase("gpt", "inference"):
+            outputs = gpt_model.generate(
+                **inputs,
+                max_length=prompt_length + 50,
+                num_return_sequences=1,
+                temperature=0.7,
+                do_sample=True,
+                pad_token_id=gpt_tokenizer.eos_token_id,
+                stopping_criteria=stopping_criteria
+            )
         
+        # Drop the (left-padded) prompt tokens and decode only the continuation
+        return [
+            gpt_tokenizer.decode(output[prompt_length:], skip_special_tokens=True).strip()
+            for output in outputs
+        ]
+    except Exception as e:
+        print(f"GPT-2 batch generation error: {e}")
+        return [None] * len(items)
+
+# Concurrent live generations are padded into one generate call per flush
+gpt_dispatcher = dispatchers.register("gpt", generate_recommendation_batch, max_batch_size=8, max_wait_ms=20.0)
+
+def advice_bank_available() -> bool:
+    """Whether bank serving is enabled and a bank has been built"""
+    return ADVICE_MODE == "bank" and ADVICE_BANK_PATH.exists()
+
+def sse_event(data: Dict, event: Optional[str] = None) -> str:
+    """Format one server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def generate_to_streamer(condition: str, aqi: float, pollen_level: int, streamer, stop: threading.Event) -> int:
+    """Run GPT-2 generation feeding decoded text into streamer until done or stop is set; returns generated token count"""
+    import torch
+    try:
+        inputs = gpt_tokenizer.encode(build_prompt(condition, aqi, pollen_level),
+                                      return_tensors="pt", max_length=100, truncation=True)
         with torch.no_grad():
             outputs = gpt_model.generate(
                 inputs,
@@ -66,14 +202,129 @@ def generate_health_recommendation(condition: str, aqi: float, pollen_level: int
                 num_return_sequences=1,
                 temperature=0.7,
                 do_sample=True,
-                pad_token_id=gpt_tokenizer.eos_token_id
+                pad_token_id=gpt_tokenizer.eos_token_id,
+                streamer=streamer,
+                stopping_criteria=event_stopping_criteria(stop)
             )
-        
-        recommendation = gpt_tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return recommendation[len(prompt):].strip()
+        return int(outputs.shape[1] - inputs.shape[1])
+    finally:
+        # Make sure the reader stops even if generation failed
+        streamer.end()
+
+def next_streamed_text(streamer) -> Optional[str]:
+    """Next decoded chunk, "" if none arrived within the streamer's timeout, None once it has ended"""
+    try:
+        return next(streamer, None)
+    except queue.Empty:
+        return ""
+
+async def stream_recommendation_events(condition: str, aqi: float, pollen_level: int):
+    """Yield {"token": ...} events, then one summary event with source and timing"""
+    start = time.perf_counter()
+    
+    # Bank hits and fallbacks are complete immediately; send them as a single chunk
+    recommendation = advice_bank.lookup(condition, get_aqi_category(aqi), pollen_level) if advice_bank else None
+    if recommendation is None:
+        await model_manager.ensure_loaded("gpt")
+    if recommendation is not None or gpt_model is None or gpt_tokenizer is None:
+        source = "bank" if recommendation is not None else "fallback"
+        text = recommendation if recommendation is not None else get_fallback_recommendation(condition, aqi, pollen_level)
+        yield {"token": text}
+        yield {"source": source, "ttft_ms": round((time.perf_counter() - start) * 1000, 2)}
+        return
+    
+    from transformers import TextIteratorStreamer
+    # The timeout bounds how long a reader thread can outlive the stream: if the client
+    # disconnects before generation starts, nothing ever ends the streamer
+    streamer = TextIteratorStreamer(gpt_tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=STREAM_POLL_S)
+    stop = threading.Event()
+    generation = asyncio.ensure_future(
+        model_executor.run("gpt", generate_to_streamer, condition, aqi, pollen_level, streamer, stop)
+    )
+    
+    loop = asyncio.get_running_loop()
+    first_token_at = None
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, next_streamed_text, streamer)
+            if chunk is None:
+                break
+            if chunk:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield {"token": chunk}
+            elif generation.done():
+                # Finished without ending the streamer (failed before generating); surface its error below
+                break
+        n_tokens = await generation
+    except Exception as e:
+        print(f"GPT-2 streaming error: {e}")
+        yield {"source": "error", "error": str(e)}
+        return
+    finally:
+        if not generation.done():
+            # The gpt lane keeps its slot until the generation thread returns; the stop flag
+            # makes that happen at the next token instead of after max_length
+            stop.set()
+            generation.cancel()
+    
+    elapsed = time.perf_counter() - start
+    ttft_ms = ((first_token_at or time.perf_counter()) - start) * 1000
+    tokens_per_sec = n_tokens / elapsed if elapsed > 0 else 0.0
+    streaming_metrics["ttft_ms"].observe(ttft_ms)
+    streaming_metrics["tokens_per_sec"].observe(tokens_per_sec)
+    yield {
+        "source": "model",
+        "ttft_ms": round(ttft_ms, 2),
+        "tokens": n_tokens,
+        "tokens_per_sec": round(tokens_per_sec, 2)
+    }
+
+def load_advice_bank():
+    """Load pre-generated recommendation bank"""
+    global advice_bank
+    try:
+        advice_bank = AdviceBank.load(ADVICE_BANK_PATH)
+        print(f"✅ Health advice bank loaded ({len(advice_bank.entries)} keys)")
+        return advice_bank
     except Exception as e:
-        print(f"GPT-2 generation error: {e}")
-        return get_fallback_recommendation(condition, aqi, pollen_level)
+        print(f"❌ Error loading health advice bank: {e}")
+        return None
+
+def get_deadline_ms(header_value: Optional[float]) -> Optional[float]:
+    """Per-request generation budget from the header or the default; None means no deadline"""
+    deadline_ms = ADVICE_DEADLINE_MS if header_value is None else header_value
+    return deadline_ms if deadline_ms > 0 else None
+
+async def resolve_recommendation(condition: str, aqi: float, pollen_level: int,
+                                 deadline_ms: Optional[float] = None) -> Tuple[str, str]:
+    """Answer from the advice bank, generating live only for out-of-bank inputs.
+
+    Returns (recommendation, source) where source is "bank", "model",
+    "fallback" (model unavailable) or "deadline" (generation exceeded deadline_ms).
+    """
+    if advice_bank is not None:
+        recommendation = advice_bank.lookup(condition, get_aqi_category(aqi), pollen_level)
+        if recommendation is not None:
+            advice_sources["bank"] += 1
+            return recommendation, "bank"
+    
+    async def generate() -> Optional[str]:
+        if not await model_manager.ensure_loaded("gpt"):
+            return None
+        return await gpt_dispatcher.submit((condition, aqi, pollen_level, deadline))
+    
+    deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+    try:
+        recommendation = await asyncio.wait_for(generate(), timeout=deadline_ms / 1000 if deadline_ms else None)
+        source = "model" if recommendation else "fallback"
+    except asyncio.TimeoutError:
+        recommendation, source = None, "deadline"
+    
+    advice_sources[source] += 1
+    if not recommendation:
+        recommendation = get_fallback_recommendation(condition, aqi, pollen_level)
+    return recommendation, source
 
 def get_fallback_recommendation(condition: str, aqi: float, pollen_level: int) -> str:
     """Fallback recommendations when GPT-2 is not available"""
@@ -121,30 +372,51 @@ def get_fallback_recommendation(condition: str, aqi: float, pollen_level: int) -
     
     return base_recommendation
 
+def build_recommendation_response(request: HealthRecommendationRequest, recommendation: str,
+                                  source: str) -> HealthRecommendationResponse:
+    """Assemble the recommendation response around generated text"""
+    return HealthRecommendationResponse(
+        condition=request.condition,
+        aqi=request.aqi,
+        aqi_category=get_aqi_category(request.aqi),
+        pollen_level=request.pollen_level,
+        recommendation=recommendation,
+        severity_level=get_severity_level(request.aqi, request.condition),
+        additional_tips=get_additional_tips(request.condition, request.aqi),
+        source=source
+    )
+
 @router.post("/recommendations", response_model=HealthRecommendationResponse)
-async def get_health_recommendations(request: HealthRecommendationRequest):
+async def get_health_recommendations(request: HealthRecommendationRequest,
+                                     x_advice_deadline_ms: Optional[float] = Header(None)):
     """Get health recommendations based on condition and air quality"""
     try:
-        recommendation = generate_health_recommendation(
-            request.condition, 
-            request.aqi, 
-            request.pollen_level
+        recommendation, source = await resolve_recommendation(
+            request.condition,
+            request.aqi,
+            request.pollen_level,
+            get_deadline_ms(x_advice_deadline_ms)
         )
         
-        aqi_category = get_aqi_category(request.aqi)
-        
-        return HealthRecommendationResponse(
-            condition=request.condition,
-            aqi=request.aqi,
-            aqi_category=aqi_category,
-            pollen_level=request.pollen_level,
-            recommendation=recommendation,
-            severity_level=get_severity_level(request.aqi, request.condition),
-            additional_tips=get_additional_tips(request.condition, request.aqi)
-        )
+        return build_recommendation_response(request, recommendation, source)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
 
+@router.post("/recommendations/stream")
+async def stream_health_recommendations(request: HealthRecommendationRequest):
+    """Stream a health recommendation as server-sent events while it is generated"""
+    async def events():
+        text = ""
+        async for event in stream_recommendation_events(request.condition, request.aqi, request.pollen_level):
+            if "token" in event:
+                text += event["token"]
+                yield sse_event(event)
+            else:
+                response = build_recommendation_response(request, text.strip(), event["source"])
+                yield sse_event({**event, "response": response.model_dump()}, "done")
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @router.get("/conditions", response_model=HealthConditionResponse)
 async def get_health_conditions():
     """Get list of supported health conditions"""
@@ -183,47 +455,84 @@ async def get_health_conditions():
     
     return HealthConditionResponse(conditions=conditions)
 
+def build_personalized_response(request: PersonalizedHealthRequest, base_recommendation: str,
+                                source: str) -> PersonalizedHealthResponse:
+    """Assemble personalized advice around the base recommendation"""
+    # Add personalized factors
+    personalized_tips = []
+    
+    if request.age and request.age > 65:
+        personalized_tips.append("As an elderly person, monitor symptoms more closely.")
+    
+    if request.has_rescue_inhaler:
+        personalized_tips.append("Keep your rescue inhaler readily available.")
+    
+    if request.uses_oxygen:
+        personalized_tips.append("Monitor your oxygen levels more frequently.")
+    
+    if request.outdoor_activities:
+        personalized_tips.append("Consider rescheduling outdoor activities for better air quality days.")
+    
+    return PersonalizedHealthResponse(
+        condition=request.condition,
+        aqi=request.aqi,
+        aqi_category=get_aqi_category(request.aqi),
+        pollen_level=request.pollen_level,
+        base_recommendation=base_recommendation,
+        personalized_tips=personalized_tips,
+        severity_level=get_severity_level(request.aqi, request.condition),
+        emergency_contact_needed=request.aqi > 200,
+        source=source
+    )
+
 @router.post("/personalized", response_model=PersonalizedHealthResponse)
-async def get_personalized_health_advice(request: PersonalizedHealthRequest):
+async def get_personalized_health_advice(request: PersonalizedHealthRequest,
+                                         x_advice_deadline_ms: Optional[float] = Header(None)):
     """Get personalized health advice based on multiple factors"""
     try:
         # Generate base recommendation
-        base_recommendation = generate_health_recommendation(
+        base_recommendation, source = await resolve_recommendation(
             request.condition,
             request.aqi,
-            request.pollen_level
+            request.pollen_level,
+            get_deadline_ms(x_advice_deadline_ms)
         )
         
-        # Add personalized factors
-        personalized_tips = []
-        
-        if request.age and request.age > 65:
-            personalized_tips.append("As an elderly person, monitor symptoms more closely.")
-        
-        if request.has_rescue_inhaler:
-            personalized_tips.append("Keep your rescue inhaler readily available.")
-        
-        if request.uses_oxygen:
-            personalized_tips.append("Monitor your oxygen levels more frequently.")
-        
-        if request.outdoor_activities:
-            personalized_tips.append("Consider rescheduling outdoor activities for better air quality days.")
-        
-        aqi_category = get_aqi_category(request.aqi)
-        
-        return PersonalizedHealthResponse(
-            condition=request.condition,
-            aqi=request.aqi,
-            aqi_category=aqi_category,
-            pollen_level=request.pollen_level,
-            base_recommendation=base_recommendation,
-            personalized_tips=personalized_tips,
-            severity_level=get_severity_level(request.aqi, request.condition),
-            emergency_contact_needed=request.aqi > 200
-        )
+        return build_personalized_response(request, base_recommendation, source)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Personalized advice error: {str(e)}")
 
+@router.post("/personalized/stream")
+async def stream_personalized_health_advice(request: PersonalizedHealthRequest):
+    """Stream personalized advice as server-sent events while the base recommendation is generated"""
+    async def events():
+        text = ""
+        async for event in stream_recommendation_events(request.condition, request.aqi, request.pollen_level):
+            if "token" in event:
+                text += event["token"]
+                yield sse_event(event)
+            else:
+                response = build_personalized_response(request, text.strip(), event["source"])
+                yield sse_event({**event, "response": response.model_dump()}, "done")
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/advice/stats")
+async def get_advice_stats():
+    """How often each recommendation path was used, including deadline fallbacks"""
+    total = sum(advice_sources.values())
+    return {
+        "default_deadline_ms": ADVICE_DEADLINE_MS,
+        "total": total,
+        "sources": dict(advice_sources),
+        "deadline_rate": advice_sources["deadline"] / total if total else 0.0
+    }
+
+@router.get("/stream/stats")
+async def get_streaming_stats():
+    """Time-to-first-token and tokens/sec across streamed generations"""
+    return {name: histogram.snapshot() for name, histogram in streaming_metrics.items()}
+
 def get_severity_level(aqi: float, condition: str) -> str:
     """Determine severity level based on AQI and condition"""
     if aqi <= 50:
@@ -267,4 +576,4 @@ def get_additional_tips(condition: str, aqi: float) -> List[str]:
             "Consider wearing N95 mask if going outside"
         ])
     
-    return tips
\ No newline at end of file
+    return tips
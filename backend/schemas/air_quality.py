@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 
 class AQIPredictionRequest(BaseModel):
     temperature: float = Field(..., description="Temperature in Celsius", ge=-50, le=60)
@@ -41,4 +41,48 @@ class LocationAQIResponse(BaseModel):
     pm25: float = Field(..., description="PM2.5")
     o3: float = Field(..., description="O3")
     latitude: Optional[float] = Field(None, description="Latitude")
-    longitude: Optional[float] = Field(None, description="Longitude")
\ No newline at end of file
+    longitude: Optional[float] = Field(None, description="Longitude")
+
+# Valid ranges for columnar batch inputs (mirrors AQIPredictionRequest)
+AQI_INPUT_RANGES = {
+    "temperature": (-50, 60),
+    "humidity": (0, 100),
+    "pressure": (800, 1100),
+    "wind_speed": (0, 50),
+    "pm25": (0, 500),
+    "o3": (0, 500)
+}
+
+class AQIBatchColumns(BaseModel):
+    temperature: List[float] = Field(..., description="Temperatures in Celsius")
+    humidity: List[float] = Field(..., description="Humidity percentages")
+    pressure: List[float] = Field(..., description="Atmospheric pressures in hPa")
+    wind_speed: List[float] = Field(..., description="Wind speeds in m/s")
+    pm25: List[float] = Field(..., description="PM2.5 concentrations in μg/m³")
+    o3: List[float] = Field(..., description="Ozone concentrations in ppb")
+
+    @model_validator(mode="after")
+    def check_columns(self):
+        lengths = {len(getattr(self, name)) for name in AQI_INPUT_RANGES}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length")
+        for name, (low, high) in AQI_INPUT_RANGES.items():
+            values = getattr(self, name)
+            if values and (min(values) < low or max(values) > high):
+                raise ValueError(f"{name} values must be between {low} and {high}")
+        return self
+
+class AQIBatchPredictionRequest(BaseModel):
+    inputs: Optional[List[AQIPredictionRequest]] = Field(None, description="Row-oriented prediction inputs")
+    columns: Optional[AQIBatchColumns] = Field(None, description="Column-oriented prediction inputs")
+
+    @model_validator(mode="after")
+    def check_one_layout(self):
+        if (self.inputs is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'inputs' or 'columns'")
+        return self
+
+class AQIBatchPredictionResponse(BaseModel):
+    count: int = Field(..., description="Number of predictions")
+    aqi: List[float] = Field(..., description="Predicted AQI values, in input order")
+    category: List[str] = Field(..., description="AQI categories, in input order")
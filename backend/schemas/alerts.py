@@ -43,4 +43,25 @@ class AlertCheckResponse(BaseModel):
     recommendations: List[str] = Field(..., description="Recommendations")
     should_alert: bool = Field(..., description="Whether alert should be triggered")
     severity_score: float = Field(..., description="Severity score (0-10)")
-    timestamp: str = Field(..., description="Check timestamp")
\ No newline at end of file
+    timestamp: str = Field(..., description="Check timestamp")
+
+class AlertReadingRequest(BaseModel):
+    location: str = Field(..., description="Location name")
+    aqi: float = Field(..., description="New Air Quality Index reading", ge=0, le=500)
+    pollen_level: Optional[int] = Field(None, description="Pollen level (1-5)", ge=1, le=5)
+
+class AlertNotification(BaseModel):
+    subscription_id: str = Field(..., description="Subscription identifier")
+    user_id: str = Field(..., description="User identifier")
+    health_condition: Optional[str] = Field(None, description="Health condition")
+    alert_threshold: int = Field(..., description="Subscriber's AQI threshold")
+    message: str = Field(..., description="Alert message for the subscriber")
+
+class AlertReadingResponse(BaseModel):
+    location: str = Field(..., description="Location name")
+    aqi: float = Field(..., description="Air Quality Index")
+    alert_level: str = Field(..., description="Alert level")
+    aqi_category: str = Field(..., description="AQI category")
+    triggered: int = Field(..., description="Number of subscriptions whose threshold the reading exceeds")
+    notifications: List[AlertNotification] = Field(..., description="Triggered subscriptions, lowest threshold first")
+    timestamp: str = Field(..., description="Evaluation timestamp")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Dict, List, Optional
 from datetime import datetime
 
@@ -18,6 +18,7 @@ class CarbonCalculationResponse(BaseModel):
     category: str = Field(..., description="Carbon footprint category")
     breakdown: Dict[str, float] = Field(..., description="CO2 breakdown by category")
     recommendations: List[str] = Field(..., description="Reduction recommendations")
+    factor_version: Optional[str] = Field(None, description="Emission factor table version used")
 
 class CarbonTrackingRequest(BaseModel):
     user_id: str = Field(..., description="User identifier")
@@ -53,4 +54,125 @@ class CarbonUpdateRequest(BaseModel):
     vegetable_consumption: float = Field(..., description="Daily vegetable consumption in kg", ge=0, le=5)
     electronics_purchases: float = Field(..., description="Monthly electronics purchases", ge=0, le=10)
     clothing_purchases: float = Field(..., description="Monthly clothing purchases", ge=0, le=20)
-    furniture_purchases: float = Field(..., description="Monthly furniture purchases", ge=0, le=5)
\ No newline at end of file
+    furniture_purchases: float = Field(..., description="Monthly furniture purchases", ge=0, le=5)
+
+class CarbonWindowSummary(BaseModel):
+    entries: int = Field(..., description="Entries in the window")
+    total_co2: float = Field(..., description="Sum of daily CO2 over the entries in kg")
+    average_daily_co2: float = Field(..., description="Average daily CO2 per entry in kg")
+    breakdown: Dict[str, float] = Field(..., description="CO2 sums by component")
+    days: Optional[int] = Field(None, description="Window length in days, ending today")
+
+class CarbonSummaryResponse(BaseModel):
+    user_id: str = Field(..., description="User identifier")
+    first_date: str = Field(..., description="First tracked day")
+    last_date: str = Field(..., description="Most recent tracked day")
+    all_time: CarbonWindowSummary = Field(..., description="Totals over the whole history")
+    windows: Dict[str, CarbonWindowSummary] = Field(..., description="Rolling 7/30/365-day totals")
+
+class CarbonPercentileResponse(BaseModel):
+    user_id: Optional[str] = Field(None, description="User whose latest footprint was ranked")
+    value: float = Field(..., description="Daily CO2 in kg that was ranked")
+    percentile: float = Field(..., description="Mid-rank percent: tracked footprints lower than value plus half of those equal to it")
+    category: str = Field(..., description="Carbon footprint category of value")
+    population: int = Field(..., description="Number of tracked footprints")
+    quantiles: Dict[str, float] = Field(..., description="Population daily CO2 at p10/p25/p50/p75/p90")
+
+CARBON_INPUT_RANGES = {
+    "daily_miles": (0, 500),
+    "public_transit_usage": (0, 1),
+    "electric_vehicle_usage": (0, 1),
+    "meat_consumption": (0, 2),
+    "dairy_consumption": (0, 2),
+    "vegetable_consumption": (0, 5),
+    "electronics_purchases": (0, 10),
+    "clothing_purchases": (0, 20),
+    "furniture_purchases": (0, 5)
+}
+
+class CarbonBatchColumns(BaseModel):
+    daily_miles: List[float] = Field(..., description="Daily miles driven")
+    public_transit_usage: List[float] = Field(..., description="Public transit usage ratios")
+    electric_vehicle_usage: Optional[List[float]] = Field(None, description="Electric vehicle usage ratios (default 0)")
+    meat_consumption: List[float] = Field(..., description="Daily meat consumption in kg")
+    dairy_consumption: List[float] = Field(..., description="Daily dairy consumption in kg")
+    vegetable_consumption: List[float] = Field(..., description="Daily vegetable consumption in kg")
+    electronics_purchases: List[float] = Field(..., description="Monthly electronics purchases")
+    clothing_purchases: List[float] = Field(..., description="Monthly clothing purchases")
+    furniture_purchases: List[float] = Field(..., description="Monthly furniture purchases")
+
+    @model_validator(mode="after")
+    def check_columns(self):
+        if self.electric_vehicle_usage is None:
+            self.electric_vehicle_usage = [0.0] * len(self.daily_miles)
+        lengths = {len(getattr(self, name)) for name in CARBON_INPUT_RANGES}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length")
+        for name, (low, high) in CARBON_INPUT_RANGES.items():
+            values = getattr(self, name)
+            if values and (min(values) < low or max(values) > high):
+                raise ValueError(f"{name} values must be between {low} and {high}")
+        return self
+
+class CarbonBatchCalculationRequest(BaseModel):
+    inputs: Optional[List[CarbonCalculationRequest]] = Field(None, description="Row-oriented lifestyle inputs")
+    columns: Optional[CarbonBatchColumns] = Field(None, description="Column-oriented lifestyle inputs")
+
+    @model_validator(mode="after")
+    def check_one_layout(self):
+        if (self.inputs is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'inputs' or 'columns'")
+        return self
+
+class CarbonBatchCalculationResponse(BaseModel):
+    count: int = Field(..., description="Number of calculations")
+    total_daily_co2: List[float] = Field(..., description="Total daily CO2 in kg, in input order")
+    category: List[str] = Field(..., description="Carbon footprint categories, in input order")
+    breakdown: Dict[str, List[float]] = Field(..., description="Daily CO2 by component, in input order")
+    recommendations: Dict[str, List[str]] = Field(..., description="Reduction recommendations for each category present")
+    factor_version: Optional[str] = Field(None, description="Emission factor table version used")
+
+class CarbonScenarioRange(BaseModel):
+    start: float = Field(..., description="First value")
+    stop: float = Field(..., description="Last value (inclusive)")
+    step: float = Field(..., description="Increment between values", gt=0)
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.stop < self.start:
+            raise ValueError("stop must not be less than start")
+        return self
+
+class CarbonScenarioRequest(BaseModel):
+    base: CarbonCalculationRequest = Field(..., description="Current lifestyle profile")
+    ranges: Dict[str, CarbonScenarioRange] = Field(..., description="Inputs to vary and the values to try")
+    top_k: int = Field(5, description="Number of lowest-emission scenarios to return", ge=1, le=100)
+    include_grid: bool = Field(True, description="Return every evaluated scenario")
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if not self.ranges:
+            raise ValueError("Provide at least one input range")
+        for name, spec in self.ranges.items():
+            if name not in CARBON_INPUT_RANGES:
+                raise ValueError(f"Unknown input '{name}'")
+            low, high = CARBON_INPUT_RANGES[name]
+            if spec.start < low or spec.stop > high:
+                raise ValueError(f"{name} range must be between {low} and {high}")
+        return self
+
+class CarbonScenario(BaseModel):
+    inputs: Dict[str, float] = Field(..., description="Values of the varied inputs")
+    total_daily_co2: float = Field(..., description="Total daily CO2 emissions in kg")
+    category: str = Field(..., description="Carbon footprint category")
+    breakdown: Dict[str, float] = Field(..., description="CO2 breakdown by category")
+    reduction: float = Field(..., description="Daily kg CO2 saved compared with the base profile")
+
+class CarbonScenarioResponse(BaseModel):
+    baseline: CarbonScenario = Field(..., description="The base profile as submitted")
+    axes: Dict[str, List[float]] = Field(..., description="Values tried for each varied input")
+    count: int = Field(..., description="Number of scenarios evaluated")
+    skipped: int = Field(..., description="Grid points skipped because transit and EV shares exceed 1")
+    top: List[CarbonScenario] = Field(..., description="Lowest-emission scenarios, best first")
+    grid: Optional[Dict[str, List]] = Field(None, description="Every scenario as columns: varied inputs, total_daily_co2, category")
+    factor_version: Optional[str] = Field(None, description="Emission factor table version used")
@@ -9,6 +9,7 @@ class ForecastRequest(BaseModel):
     base_wind_speed: float = Field(..., description="Base wind speed in m/s", ge=0, le=50)
     base_pm25: float = Field(..., description="Base PM2.5 concentration in μg/m³", ge=0, le=500)
     base_o3: float = Field(..., description="Base O3 concentration in ppb", ge=0, le=500)
+    seed: Optional[int] = Field(None, description="Random seed for reproducible (cacheable) forecasts", ge=0)
 
 class HourlyForecast(BaseModel):
     hour: int = Field(..., description="Hour of day (0-23)")
@@ -23,4 +24,7 @@ class ForecastResponse(BaseModel):
     hourly_forecasts: List[HourlyForecast] = Field(..., description="Hourly forecast data")
     average_aqi: float = Field(..., description="Average AQI over forecast period")
     max_aqi: float = Field(..., description="Maximum AQI in forecast")
-    min_aqi: float = Field(..., description="Minimum AQI in forecast")
\ No newline at end of file
+    min_aqi: float = Field(..., description="Minimum AQI in forecast")
+
+class ForecastBatchRequest(BaseModel):
+    requests: List[ForecastRequest] = Field(..., description="Per-location forecast inputs", min_length=1)
@@ -14,6 +14,7 @@ class HealthRecommendationResponse(BaseModel):
     recommendation: str = Field(..., description="Health recommendation")
     severity_level: str = Field(..., description="Severity level (Low, Moderate, High, Critical)")
     additional_tips: List[str] = Field(..., description="Additional health tips")
+    source: str = Field("model", description="Path that produced the recommendation (bank, model, fallback, deadline)")
 
 class HealthCondition(BaseModel):
     condition: str = Field(..., description="Health condition name")
@@ -41,4 +42,5 @@ class PersonalizedHealthResponse(BaseModel):
     base_recommendation: str = Field(..., description="Base health recommendation")
     personalized_tips: List[str] = Field(..., description="Personalized health tips")
     severity_level: str = Field(..., description="Severity level")
-    emergency_contact_needed: bool = Field(..., description="Whether emergency contact is needed")
\ No newline at end of file
+    emergency_contact_needed: bool = Field(..., description="Whether emergency contact is needed")
+    source: str = Field("model", description="Path that produced the base recommendation (bank, model, fallback, deadline)")
\ No newline at end of file
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import Histogram, LATENCY_BUCKETS_MS
+
+class CostClass:
+    """Concurrency and queue limits shared by every route of one cost class.
+
+    Up to max_concurrency requests run at once and up to max_queue more wait
+    for a slot (at most queue_timeout_ms). Anything beyond that is rejected
+    immediately so the worker never holds more than a bounded amount of work.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int = 0,
+                 queue_timeout_ms: float = 1000.0, retry_after: int = 1):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout_ms = queue_timeout_ms
+        self.retry_after = retry_after
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the bounded queue if needed; False means shed the request"""
+        # Count requests still waiting on the semaphore as queued, even if a slot is free
+        if self.in_flight + self.queued >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            return False
+
+        enqueued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self.rejected += 1
+            return False
+        finally:
+            self.queued -= 1
+
+        self.queue_wait_ms.observe((time.perf_counter() - enqueued_at) * 1000)
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_timeouts": self.timed_out,
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
+
+class AdmissionController:
+    """Maps requests to cost classes by method and longest matching path prefix"""
+
+    def __init__(self):
+        self.classes: Dict[str, CostClass] = {}
+        self.routes: List[Tuple[str, str, str]] = []
+
+    def configure(self, classes: Dict[str, Dict], routes: Dict[Tuple[str, str], str]):
+        """Replace the cost classes and the (method, path prefix) -> class table"""
+        self.classes = {name: CostClass(name, **config) for name, config in classes.items()}
+        # Longest prefix first so specific routes win over their parents
+        self.routes = sorted(
+            ((method.upper(), prefix, cost_class) for (method, prefix), cost_class in routes.items()),
+            key=lambda route: len(route[1]), reverse=True
+        )
+
+    def classify(self, method: str, path: str) -> Optional[CostClass]:
+        """Cost class for a request, or None for unlimited (cheap) routes"""
+        for route_method, prefix, cost_class in self.routes:
+            if (route_method == "*" or route_method == method) and path.startswith(prefix):
+                return self.classes.get(cost_class)
+        return None
+
+    def stats(self) -> Dict:
+        return {name: cost_class.stats() for name, cost_class in self.classes.items()}
+
+class AdmissionMiddleware:
+    """ASGI middleware that sheds load with 503 + Retry-After when a cost class is saturated.
+
+    The slot is held until the response (including any streamed body) has
+    been fully sent.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        cost_class = self.controller.classify(scope["method"], scope["path"])
+        if cost_class is None:
+            return await self.app(scope, receive, send)
+
+        if not await cost_class.acquire():
+            return await self.reject(cost_class, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            cost_class.release()
+
+    async def reject(self, cost_class: CostClass, send):
+        body = json.dumps({
+            "detail": "Server is at capacity, retry later",
+            "cost_class": cost_class.name
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(cost_class.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+# Shared controller configured by main.py
+admission_controller = AdmissionController()
@@ -0,0 +1,92 @@
+import json
+import os
+import random
+import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.constants import AQI_CATEGORIES, HEALTH_CONDITIONS, POLLEN_LEVELS
+
+ADVICE_BANK_PATH = Path(__file__).parent.parent.parent / "models/health_advice_bank.json"
+ADVICE_BANK_VERSION = 1
+
+# AQI used in the generation prompt for each category (bucket midpoint)
+REPRESENTATIVE_AQI = {
+    category: (bounds["min"] + bounds["max"]) // 2
+    for category, bounds in AQI_CATEGORIES.items()
+}
+
+def bank_key(condition: str, aqi_category: str, pollen_level: int) -> str:
+    return f"{condition}|{aqi_category}|{pollen_level}"
+
+class AdviceBank:
+    """Pre-generated recommendation candidates keyed by (condition, AQI category, pollen level)"""
+
+    def __init__(self, entries: Dict[str, List[str]], built_at: Optional[str] = None, candidates_per_key: int = 0):
+        # Tuples keep the in-memory bank compact and immutable
+        self.entries: Dict[str, Tuple[str, ...]] = {key: tuple(values) for key, values in entries.items() if values}
+        self.built_at = built_at
+        self.candidates_per_key = candidates_per_key
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Path = ADVICE_BANK_PATH) -> "AdviceBank":
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != ADVICE_BANK_VERSION:
+            raise ValueError(f"Unsupported advice bank version: {data.get('version')}")
+        return cls(data["entries"], data.get("built_at"), data.get("candidates_per_key", 0))
+
+    def save(self, path: Path = ADVICE_BANK_PATH):
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": ADVICE_BANK_VERSION,
+                "built_at": self.built_at,
+                "candidates_per_key": self.candidates_per_key,
+                "entries": {key: list(values) for key, values in self.entries.items()}
+            }, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def lookup(self, condition: str, aqi_category: str, pollen_level: int) -> Optional[str]:
+        """Pick one candidate for the inputs, or None when they are out of bank"""
+        candidates = self.entries.get(bank_key(condition, aqi_category, pollen_level))
+        if not candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return random.choice(candidates)
+
+    def info(self) -> Dict:
+        return {
+            "built_at": self.built_at,
+            "keys": len(self.entries),
+            "candidates_per_key": self.candidates_per_key,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+def build_advice_bank(generate_fn: Callable[[str, float, int, int], List[str]],
+                      candidates_per_key: int = 4) -> AdviceBank:
+    """Generate candidates for every (condition, AQI category, pollen level) combination.
+
+    generate_fn(condition, aqi, pollen_level, n) must return up to n recommendations.
+    Combinations where generation fails are left out and served live.
+    """
+    entries = {}
+    combinations = [
+        (condition, category, pollen_level)
+        for condition in HEALTH_CONDITIONS
+        for category in AQI_CATEGORIES
+        for pollen_level in POLLEN_LEVELS
+    ]
+    for i, (condition, category, pollen_level) in enumerate(combinations, 1):
+        try:
+            candidates = generate_fn(condition, REPRESENTATIVE_AQI[category], pollen_level, candidates_per_key)
+            entries[bank_key(condition, category, pollen_level)] = [c for c in candidates if c]
+        except Exception as e:
+            print(f"⚠️  Skipping {condition}/{category}/pollen {pollen_level}: {e}")
+        if i % 25 == 0 or i == len(combinations):
+            print(f"[INFO] Generated {i}/{len(combinations)} combinations")
+    return AdviceBank(entries, datetime.datetime.now().isoformat(), candidates_per_key)
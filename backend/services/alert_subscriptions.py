@@ -0,0 +1,305 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import datetime
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ALERT_DB_PATH = Path(__file__).parent.parent.parent / "data/alerts/alert_subscriptions.db"
+
+# How long changelog rows are kept for other workers to catch up; a worker further behind reloads everything
+CHANGELOG_RETENTION_S = 3600
+
+# (subscription_id, user_id, health_condition, alert_threshold)
+Subscription = Tuple[str, str, Optional[str], int]
+
+class LocationSubscriptions:
+    """One location's subscriptions in alert_threshold order, with a parallel threshold list for bisect"""
+
+    __slots__ = ("thresholds", "subscriptions")
+
+    def __init__(self):
+        self.thresholds: List[int] = []
+        self.subscriptions: List[Subscription] = []
+
+    def add(self, subscription: Subscription):
+        i = bisect_right(self.thresholds, subscription[3])
+        self.thresholds.insert(i, subscription[3])
+        self.subscriptions.insert(i, subscription)
+
+    def remove(self, subscription_id: str, threshold: int):
+        i = bisect_left(self.thresholds, threshold)
+        while self.subscriptions[i][0] != subscription_id:
+            i += 1
+        del self.thresholds[i]
+        del self.subscriptions[i]
+
+    def triggered(self, aqi: float) -> List[Subscription]:
+        """Subscriptions whose threshold the reading exceeds: O(log n + matches)"""
+        return self.subscriptions[:bisect_left(self.thresholds, aqi)]
+
+class AlertSubscriptionRegistry:
+    """Alert subscriptions indexed by location and threshold, persisted to SQLite.
+
+    One subscription per (user_id, location); subscribing again updates it.
+    Evaluating a reading bisects the location's sorted thresholds, so it
+    never touches subscribers who are not triggered. SQLite is the source
+    of truth: the in-memory index is loaded from it at startup. Triggers log
+    every changed subscription_id to alert_subscription_changes, and when
+    another worker has written (checked at most every check_interval
+    seconds) only the subscriptions changed since the last seen version are
+    re-read. With path=None nothing is persisted.
+    """
+
+    def __init__(self, path: Optional[Path] = ALERT_DB_PATH, check_interval: float = 5.0):
+        self.path = Path(path) if path is not None else None
+        self.check_interval = check_interval
+        self.locations: Dict[str, LocationSubscriptions] = {}
+        # subscription_id -> (location, subscription)
+        self.by_id: Dict[str, Tuple[str, Subscription]] = {}
+        self.by_user_location: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        # Highest alert_subscription_changes version applied to the index
+        self._version = 0
+        self._last_check = 0.0
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA busy_timeout=30000")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS alert_subscriptions (
+                    subscription_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    health_condition TEXT,
+                    alert_threshold INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    UNIQUE (user_id, location)
+                );
+                CREATE INDEX IF NOT EXISTS idx_alert_subscriptions_location
+                    ON alert_subscriptions (location, alert_threshold);
+                CREATE TABLE IF NOT EXISTS alert_subscription_changes (
+                    version INTEGER PRIMARY KEY AUTOINCREMENT,
+                    subscription_id TEXT NOT NULL,
+                    changed_at INTEGER NOT NULL
+                );
+                CREATE TRIGGER IF NOT EXISTS alert_subscriptions_logged_insert
+                    AFTER INSERT ON alert_subscriptions BEGIN
+                    INSERT INTO alert_subscription_changes (subscription_id, changed_at)
+                        VALUES (NEW.subscription_id, CAST(strftime('%s', 'now') AS INTEGER));
+                END;
+                CREATE TRIGGER IF NOT EXISTS alert_subscriptions_logged_update
+                    AFTER UPDATE ON alert_subscriptions BEGIN
+                    INSERT INTO alert_subscription_changes (subscription_id, changed_at)
+                        VALUES (NEW.subscription_id, CAST(strftime('%s', 'now') AS INTEGER));
+                END;
+                CREATE TRIGGER IF NOT EXISTS alert_subscriptions_logged_delete
+                    AFTER DELETE ON alert_subscriptions BEGIN
+                    INSERT INTO alert_subscription_changes (subscription_id, changed_at)
+                        VALUES (OLD.subscription_id, CAST(strftime('%s', 'now') AS INTEGER));
+                END;
+            """)
+            self._load()
+
+    def _index(self, subscription_id: str, user_id: str, location: str,
+               health_condition: Optional[str], alert_threshold: int):
+        subscription = (subscription_id, user_id, health_condition, alert_threshold)
+        subscriptions = self.locations.get(location)
+        if subscriptions is None:
+            subscriptions = self.locations[location] = LocationSubscriptions()
+        subscriptions.add(subscription)
+        self.by_id[subscription_id] = (location, subscription)
+        self.by_user_location[(user_id, location)] = subscription_id
+
+    def _unindex(self, subscription_id: str):
+        location, (_, user_id, _, threshold) = self.by_id.pop(subscription_id)
+        del self.by_user_location[(user_id, location)]
+        subscriptions = self.locations[location]
+        subscriptions.remove(subscription_id, threshold)
+        if not subscriptions.thresholds:
+            del self.locations[location]
+
+    def _load(self):
+        """Rebuild the index from the database (call with _lock held)"""
+        start = time.perf_counter()
+        self.locations, self.by_id, self.by_user_location = {}, {}, {}
+        # Read first: a commit landing before the snapshot then shows up as a (harmless) change to replay
+        self._data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        # One read transaction so the rows and the changelog version are the same snapshot
+        self._connection.execute("BEGIN")
+        try:
+            self._version = self._connection.execute(
+                "SELECT COALESCE(MAX(version), 0) FROM alert_subscription_changes"
+            ).fetchone()[0]
+            rows = self._connection.execute(
+                "SELECT subscription_id, user_id, location, health_condition, alert_threshold"
+                " FROM alert_subscriptions ORDER BY location, alert_threshold"
+            )
+            for subscription_id, user_id, location, condition, threshold in rows:
+                # Rows arrive in threshold order, so appending keeps each location sorted
+                subscriptions = self.locations.get(location)
+                if subscriptions is None:
+                    subscriptions = self.locations[location] = LocationSubscriptions()
+                subscription = (subscription_id, user_id, condition, threshold)
+                subscriptions.thresholds.append(threshold)
+                subscriptions.subscriptions.append(subscription)
+                self.by_id[subscription_id] = (location, subscription)
+                self.by_user_location[(user_id, location)] = subscription_id
+        finally:
+            self._connection.execute("COMMIT")
+        self._last_check = time.monotonic()
+        if self.by_id:
+            print(f"✅ Loaded {len(self.by_id)} alert subscriptions for {len(self.locations)} locations "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+    def _apply_changes(self) -> bool:
+        """Re-read subscriptions changed since self._version; False if the changelog no longer reaches back that far"""
+        changes = self._connection.execute(
+            "SELECT c.version, c.subscription_id, s.user_id, s.location, s.health_condition, s.alert_threshold"
+            " FROM alert_subscription_changes c LEFT JOIN alert_subscriptions s USING (subscription_id)"
+            " WHERE c.version > ? ORDER BY c.version", (self._version,)
+        ).fetchall()
+        if changes and changes[0][0] != self._version + 1:
+            return False
+        for version, subscription_id, user_id, location, condition, threshold in changes:
+            # Each change is replaced by the row's current state, so replaying our own writes is harmless
+            if subscription_id in self.by_id:
+                self._unindex(subscription_id)
+            if location is not None:
+                replaced = self.by_user_location.get((user_id, location))
+                if replaced is not None:
+                    self._unindex(replaced)
+                self._index(subscription_id, user_id, location, condition, threshold)
+            self._version = version
+        return True
+
+    def _refresh(self):
+        """Apply other workers' changes to the index (call with _lock held)"""
+        if self._connection is None:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        # data_version only changes for commits made through other connections
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        if not self._apply_changes():
+            self._load()
+
+    def _prune_changelog(self):
+        """Drop changelog rows older than CHANGELOG_RETENTION_S, always keeping the newest (call inside a write)"""
+        self._connection.execute(
+            "DELETE FROM alert_subscription_changes WHERE version < COALESCE("
+            " (SELECT version FROM alert_subscription_changes WHERE changed_at >= ? ORDER BY version LIMIT 1),"
+            " (SELECT MAX(version) FROM alert_subscription_changes))",
+            (int(time.time()) - CHANGELOG_RETENTION_S,)
+        )
+
+    def _write(self, statements: Callable[[], Any]) -> Any:
+        """Run statements in a write transaction and bring the index up to date with it (call with _lock held)"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements()
+            # Holding the write lock, the changelog is complete up to and including this write
+            caught_up = self._apply_changes()
+            self._prune_changelog()
+            self._connection.execute("COMMIT")
+        except Exception:
+            self._connection.execute("ROLLBACK")
+            # The index may already reflect the rolled-back write
+            self._load()
+            raise
+        if not caught_up:
+            self._load()
+        return result
+
+    def subscribe(self, user_id: str, location: str, health_condition: Optional[str],
+                  alert_threshold: int) -> str:
+        """Create or update the user's subscription for a location and return its id"""
+        with self._lock:
+            self._refresh()
+            previous = self.by_user_location.get((user_id, location))
+            subscription_id = previous or f"sub_{secrets.token_hex(8)}"
+            if self._connection is None:
+                if previous is not None:
+                    self._unindex(previous)
+                self._index(subscription_id, user_id, location, health_condition, alert_threshold)
+                return subscription_id
+
+            def upsert() -> str:
+                self._connection.execute(
+                    "INSERT INTO alert_subscriptions"
+                    " (subscription_id, user_id, location, health_condition, alert_threshold, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (user_id, location) DO UPDATE SET"
+                    " health_condition = excluded.health_condition, alert_threshold = excluded.alert_threshold",
+                    (subscription_id, user_id, location, health_condition, alert_threshold,
+                     datetime.datetime.now().isoformat())
+                )
+                # Another worker may have created this subscription since our last refresh
+                return self._connection.execute(
+                    "SELECT subscription_id FROM alert_subscriptions WHERE user_id = ? AND location = ?",
+                    (user_id, location)
+                ).fetchone()[0]
+
+            return self._write(upsert)
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            if self._connection is None:
+                if subscription_id not in self.by_id:
+                    return False
+                self._unindex(subscription_id)
+                return True
+            # Also covers subscriptions another worker created since our last refresh
+            return self._write(lambda: self._connection.execute(
+                "DELETE FROM alert_subscriptions WHERE subscription_id = ?", (subscription_id,)
+            ).rowcount > 0)
+
+    def get(self, subscription_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._refresh()
+            if subscription_id not in self.by_id:
+                return None
+            location, (_, user_id, condition, threshold) = self.by_id[subscription_id]
+        return {
+            "subscription_id": subscription_id,
+            "user_id": user_id,
+            "location": location,
+            "health_condition": condition,
+            "alert_threshold": threshold
+        }
+
+    def evaluate(self, location: str, aqi: float) -> List[Subscription]:
+        """Every subscription at location whose alert_threshold is below the new reading"""
+        with self._lock:
+            self._refresh()
+            subscriptions = self.locations.get(location)
+            return subscriptions.triggered(aqi) if subscriptions is not None else []
+
+    def info(self) -> Dict:
+        return {
+            "backend": "sqlite" if self.path is not None else "memory",
+            "path": str(self.path) if self.path is not None else None,
+            "subscriptions": len(self.by_id),
+            "locations": len(self.locations)
+        }
+
+def create_subscription_registry(backend: Optional[str] = None, path: Optional[Path] = None) -> AlertSubscriptionRegistry:
+    """Build the configured registry ("sqlite" by default, or "memory")"""
+    backend = backend or os.getenv("ALERT_STORE", "sqlite")
+    if backend == "memory":
+        return AlertSubscriptionRegistry(None)
+    if backend == "sqlite":
+        return AlertSubscriptionRegistry(path or Path(os.getenv("ALERT_DB_PATH", str(ALERT_DB_PATH))))
+    raise ValueError(f"Unknown alert store backend: {backend}")
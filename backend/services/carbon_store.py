@@ -0,0 +1,441 @@
+import os
+import sqlite3
+import threading
+import datetime
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.quantile_sketch import TDigest
+
+CARBON_DB_PATH = Path(__file__).parent.parent.parent / "data/carbon/carbon_history.db"
+
+# Breakdown components stored as their own columns
+BREAKDOWN_FIELDS = ("transportation", "food", "consumer")
+
+# Running sums kept per user and day: entry count, total CO2, then each breakdown component
+AGGREGATE_FIELDS = ("entries", "total_daily_co2") + BREAKDOWN_FIELDS
+
+# Rolling windows reported by summaries, in days (ending today, inclusive)
+SUMMARY_WINDOWS = (7, 30, 365)
+
+# Population percentiles reported alongside a percentile rank
+POPULATION_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+def entry_day(entry: Dict) -> str:
+    """Calendar day (YYYY-MM-DD) of an entry's ISO timestamp"""
+    return entry["date"][:10]
+
+def entry_values(entry: Dict) -> Tuple[float, ...]:
+    """Aggregate contributions of one entry, in AGGREGATE_FIELDS order"""
+    breakdown = entry["breakdown"]
+    return (1, entry["total_daily_co2"], *(breakdown[field] for field in BREAKDOWN_FIELDS))
+
+def build_summary(day_sums: Callable[[Optional[str]], Tuple[float, ...]], first_day: str, last_day: str,
+                  today: datetime.date) -> Dict:
+    """Summary from cumulative sums; day_sums(day) returns the running sums up to and including day"""
+    def describe(sums: Tuple[float, ...]) -> Dict:
+        entries, total, *components = sums
+        return {
+            "entries": int(entries),
+            "total_co2": round(total, 2),
+            "average_daily_co2": round(total / entries, 2) if entries else 0.0,
+            "breakdown": {field: round(value, 2) for field, value in zip(BREAKDOWN_FIELDS, components)}
+        }
+
+    current = day_sums(today.isoformat())
+    windows = {}
+    for days in SUMMARY_WINDOWS:
+        before = day_sums((today - datetime.timedelta(days=days)).isoformat())
+        windows[f"{days}d"] = {"days": days, **describe(tuple(a - b for a, b in zip(current, before)))}
+    return {
+        "first_date": first_day,
+        "last_date": last_day,
+        "all_time": describe(day_sums(None)),
+        "windows": windows
+    }
+
+def describe_rank(sketch: TDigest, value: float) -> Optional[Dict]:
+    """Mid-rank percentile of value among all tracked footprints (ties count half), from the sketch"""
+    if not sketch.count:
+        return None
+    return {
+        "value": value,
+        "percentile": round(sketch.cdf(value) * 100, 1),
+        "population": sketch.count,
+        "quantiles": {f"p{round(q * 100)}": round(sketch.quantile(q), 2) for q in POPULATION_QUANTILES}
+    }
+
+class CarbonStore(ABC):
+    """Storage interface for per-user carbon tracking history.
+
+    Entries are dicts with date (ISO string), total_daily_co2, category and
+    breakdown ({transportation, food, consumer}); history is returned oldest
+    first, matching the order entries were tracked.
+    """
+
+    @abstractmethod
+    def add_entry(self, user_id: str, entry: Dict) -> int:
+        """Append an entry and return the user's total entry count"""
+
+    @abstractmethod
+    def has_user(self, user_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def history(self, user_id: str, limit: int) -> List[Dict]:
+        """The user's most recent `limit` entries, oldest first"""
+
+    @abstractmethod
+    def summary(self, user_id: str, today: Optional[datetime.date] = None) -> Optional[Dict]:
+        """All-time and rolling-window totals from the running aggregates, or None for unknown users.
+
+        Cost is a few lookups into per-day running sums, independent of how
+        much history the user has.
+        """
+
+    @abstractmethod
+    def percentile(self, value: float) -> Optional[Dict]:
+        """Rank of a daily footprint among every tracked entry, or None before any tracking.
+
+        Answered from a t-digest updated on each write, so cost does not
+        depend on the number of users or entries.
+        """
+
+    @abstractmethod
+    def info(self) -> Dict:
+        ...
+
+class MemoryCarbonStore(CarbonStore):
+    """Process-local store; history is lost on restart and not shared across workers"""
+
+    def __init__(self):
+        self.data: Dict[str, List[Dict]] = {}
+        # Per user: sorted days and the running sums up to each day
+        self.days: Dict[str, List[str]] = {}
+        self.cumulative: Dict[str, List[List[float]]] = {}
+        self.sketch = TDigest()
+        # Writes run on a multi-thread lane; one lock covers the history, aggregates and sketch
+        # together, as the SQLite store's write transaction does
+        self._lock = threading.Lock()
+
+    def add_entry(self, user_id: str, entry: Dict) -> int:
+        day, values = entry_day(entry), entry_values(entry)
+        with self._lock:
+            entries = self.data.setdefault(user_id, [])
+            entries.append(entry)
+            self.sketch.add(entry["total_daily_co2"])
+
+            days = self.days.setdefault(user_id, [])
+            cumulative = self.cumulative.setdefault(user_id, [])
+            i = bisect_left(days, day)
+            if i == len(days) or days[i] != day:
+                days.insert(i, day)
+                cumulative.insert(i, list(cumulative[i - 1]) if i else [0.0] * len(AGGREGATE_FIELDS))
+            # Entries are tracked "now", so this normally touches only the last day
+            for sums in cumulative[i:]:
+                for k, value in enumerate(values):
+                    sums[k] += value
+            return len(entries)
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self.data
+
+    def history(self, user_id: str, limit: int) -> List[Dict]:
+        with self._lock:
+            return self.data.get(user_id, [])[-limit:] if limit > 0 else []
+
+    def summary(self, user_id: str, today: Optional[datetime.date] = None) -> Optional[Dict]:
+        with self._lock:
+            days = self.days.get(user_id)
+            if not days:
+                return None
+            cumulative = self.cumulative[user_id]
+
+            def day_sums(day: Optional[str]) -> Tuple[float, ...]:
+                i = len(days) if day is None else bisect_right(days, day)
+                return tuple(cumulative[i - 1]) if i else (0.0,) * len(AGGREGATE_FIELDS)
+
+            return build_summary(day_sums, days[0], days[-1], today or datetime.date.today())
+
+    def percentile(self, value: float) -> Optional[Dict]:
+        with self._lock:
+            return describe_rank(self.sketch, value)
+
+    def info(self) -> Dict:
+        return {"backend": "memory", "users": len(self.data), "sketch": self.sketch.info()}
+
+class SQLiteCarbonStore(CarbonStore):
+    """SQLite store in WAL mode with an index on (user_id, date).
+
+    WAL lets every uvicorn worker read while one writes, so all workers see
+    the same history. Each thread gets its own connection. A history query is
+    an index range scan: O(log n + days). carbon_daily keeps per-day running
+    sums, updated in the same transaction as each write, so summaries are a
+    handful of primary-key seeks. carbon_sketch holds the t-digest of all
+    totals, also saved with each write; a worker reloads it when the stored
+    count shows another worker has written since.
+    """
+
+    def __init__(self, path: Path = CARBON_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._sketch = TDigest()
+        self._sketch_lock = threading.Lock()
+        self._create_schema()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints; a crash can only lose the last few commits
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self):
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS carbon_entries (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                total_daily_co2 REAL NOT NULL,
+                category TEXT NOT NULL,
+                transportation REAL NOT NULL,
+                food REAL NOT NULL,
+                consumer REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_carbon_entries_user_date ON carbon_entries (user_id, date);
+            -- Running sums of each user's entries up to and including each tracked day
+            CREATE TABLE IF NOT EXISTS carbon_daily (
+                user_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                entries INTEGER NOT NULL,
+                total_daily_co2 REAL NOT NULL,
+                transportation REAL NOT NULL,
+                food REAL NOT NULL,
+                consumer REAL NOT NULL,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID;
+            -- Quantile sketch of every entry's total_daily_co2 (see services/quantile_sketch.py)
+            CREATE TABLE IF NOT EXISTS carbon_sketch (
+                name TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                means BLOB NOT NULL,
+                weights BLOB NOT NULL
+            );
+        """)
+        # Databases created before running aggregates existed get them backfilled once
+        has_entries = self.connection.execute("SELECT 1 FROM carbon_entries LIMIT 1").fetchone()
+        has_daily = self.connection.execute("SELECT 1 FROM carbon_daily LIMIT 1").fetchone()
+        if has_entries and not has_daily:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self._rebuild_daily(None)
+            self.connection.execute("COMMIT")
+        has_sketch = self.connection.execute("SELECT 1 FROM carbon_sketch LIMIT 1").fetchone()
+        if has_entries and not has_sketch:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self._rebuild_sketch()
+            self.connection.execute("COMMIT")
+
+    def _rebuild_daily(self, user_ids: Optional[List[str]]):
+        """Recompute running per-day sums from raw entries for some users (None = all)"""
+        where, params = "", ()
+        if user_ids is not None:
+            placeholders = ",".join("?" * len(user_ids))
+            where, params = f"WHERE user_id IN ({placeholders})", tuple(user_ids)
+            self.connection.execute(f"DELETE FROM carbon_daily {where}", params)
+        else:
+            self.connection.execute("DELETE FROM carbon_daily")
+        running = ", ".join(f"SUM({field}) OVER (PARTITION BY user_id ORDER BY day)" for field in AGGREGATE_FIELDS)
+        self.connection.execute(f"""
+            INSERT INTO carbon_daily (user_id, day, {", ".join(AGGREGATE_FIELDS)})
+            SELECT user_id, day, {running} FROM (
+                SELECT user_id, substr(date, 1, 10) AS day, COUNT(*) AS entries,
+                       SUM(total_daily_co2) AS total_daily_co2, SUM(transportation) AS transportation,
+                       SUM(food) AS food, SUM(consumer) AS consumer
+                FROM carbon_entries {where}
+                GROUP BY user_id, day
+            )
+        """, params)
+
+    def _rebuild_sketch(self):
+        """Build the quantile sketch from every stored entry"""
+        sketch = TDigest()
+        cursor = self.connection.execute("SELECT total_daily_co2 FROM carbon_entries")
+        while True:
+            rows = cursor.fetchmany(100000)
+            if not rows:
+                break
+            sketch.add_many([row[0] for row in rows])
+        self._sketch = sketch
+        self._save_sketch()
+
+    def _current_sketch(self) -> TDigest:
+        """The shared sketch, reloaded if the stored one has moved on (call with _sketch_lock held)"""
+        connection = self.connection
+        row = connection.execute("SELECT count FROM carbon_sketch WHERE name = 'total_daily_co2'").fetchone()
+        if (row[0] if row else 0) != self._sketch.count:
+            state = connection.execute(
+                "SELECT count, min, max, means, weights FROM carbon_sketch WHERE name = 'total_daily_co2'"
+            ).fetchone()
+            self._sketch = TDigest.from_state(state)
+        return self._sketch
+
+    def _save_sketch(self):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO carbon_sketch (name, count, min, max, means, weights)"
+            " VALUES ('total_daily_co2', ?, ?, ?, ?, ?)",
+            self._sketch.to_state()
+        )
+
+    def _apply_sketch(self, totals: List[float]):
+        """Add totals to the sketch and save it (inside the write transaction)"""
+        with self._sketch_lock:
+            sketch = self._current_sketch()
+            if len(totals) == 1:
+                sketch.add(totals[0])
+            else:
+                sketch.add_many(totals)
+            self._save_sketch()
+
+    def _apply_daily(self, user_id: str, entry: Dict):
+        """Add one entry to the running sums of its day and every later day"""
+        day, values = entry_day(entry), entry_values(entry)
+        connection = self.connection
+        previous = connection.execute(
+            f"SELECT {', '.join(AGGREGATE_FIELDS)} FROM carbon_daily WHERE user_id = ? AND day < ?"
+            " ORDER BY day DESC LIMIT 1",
+            (user_id, day)
+        ).fetchone() or (0,) * len(AGGREGATE_FIELDS)
+        connection.execute(
+            f"INSERT OR IGNORE INTO carbon_daily (user_id, day, {', '.join(AGGREGATE_FIELDS)})"
+            f" VALUES (?, ?, {', '.join('?' * len(AGGREGATE_FIELDS))})",
+            (user_id, day, *previous)
+        )
+        # Entries are tracked "now", so this normally updates only the latest day
+        connection.execute(
+            f"UPDATE carbon_daily SET {', '.join(f'{field} = {field} + ?' for field in AGGREGATE_FIELDS)}"
+            " WHERE user_id = ? AND day >= ?",
+            (*values, user_id, day)
+        )
+
+    def _latest_sums(self, user_id: str, day: Optional[str] = None) -> Optional[Tuple]:
+        """Running sums up to and including day (latest day if None)"""
+        query = f"SELECT {', '.join(AGGREGATE_FIELDS)} FROM carbon_daily WHERE user_id = ?"
+        params: Tuple = (user_id,)
+        if day is not None:
+            query += " AND day <= ?"
+            params += (day,)
+        return self.connection.execute(query + " ORDER BY day DESC LIMIT 1", params).fetchone()
+
+    @staticmethod
+    def _row(user_id: str, entry: Dict) -> Tuple:
+        breakdown = entry["breakdown"]
+        return (user_id, entry["date"], entry["total_daily_co2"], entry["category"],
+                *(breakdown[field] for field in BREAKDOWN_FIELDS))
+
+    def add_entry(self, user_id: str, entry: Dict) -> int:
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT INTO carbon_entries (user_id, date, total_daily_co2, category, transportation, food, consumer)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._row(user_id, entry)
+            )
+            self._apply_daily(user_id, entry)
+            self._apply_sketch([entry["total_daily_co2"]])
+            count = int(self._latest_sums(user_id)[0])
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            # The in-memory sketch may hold the rolled-back totals; reload it on next use
+            self._sketch = TDigest()
+            raise
+        return count
+
+    def add_entries(self, rows: List[Tuple[str, Dict]]):
+        """Bulk insert (user_id, entry) pairs in one transaction"""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO carbon_entries (user_id, date, total_daily_co2, category, transportation, food, consumer)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._row(user_id, entry) for user_id, entry in rows)
+            )
+            self._rebuild_daily(list({user_id for user_id, _ in rows}))
+            self._apply_sketch([entry["total_daily_co2"] for _, entry in rows])
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            # The in-memory sketch may hold the rolled-back totals; reload it on next use
+            self._sketch = TDigest()
+            raise
+
+    def has_user(self, user_id: str) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM carbon_entries WHERE user_id = ? LIMIT 1", (user_id,)
+        ).fetchone() is not None
+
+    def history(self, user_id: str, limit: int) -> List[Dict]:
+        if limit <= 0:
+            return []
+        rows = self.connection.execute(
+            "SELECT date, total_daily_co2, category, transportation, food, consumer FROM carbon_entries"
+            " WHERE user_id = ? ORDER BY date DESC, id DESC LIMIT ?",
+            (user_id, limit)
+        ).fetchall()
+        return [
+            {
+                "date": date,
+                "total_daily_co2": total,
+                "category": category,
+                "breakdown": dict(zip(BREAKDOWN_FIELDS, components))
+            }
+            for date, total, category, *components in reversed(rows)
+        ]
+
+    def summary(self, user_id: str, today: Optional[datetime.date] = None) -> Optional[Dict]:
+        first = self.connection.execute(
+            "SELECT day FROM carbon_daily WHERE user_id = ? ORDER BY day LIMIT 1", (user_id,)
+        ).fetchone()
+        if first is None:
+            return None
+        last_day = self.connection.execute(
+            "SELECT day FROM carbon_daily WHERE user_id = ? ORDER BY day DESC LIMIT 1", (user_id,)
+        ).fetchone()[0]
+
+        def day_sums(day: Optional[str]) -> Tuple[float, ...]:
+            return self._latest_sums(user_id, day) or (0.0,) * len(AGGREGATE_FIELDS)
+
+        return build_summary(day_sums, first[0], last_day, today or datetime.date.today())
+
+    def percentile(self, value: float) -> Optional[Dict]:
+        with self._sketch_lock:
+            return describe_rank(self._current_sketch(), value)
+
+    def info(self) -> Dict:
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "size_bytes": os.path.getsize(self.path),
+            "sketch": self._sketch.info()
+        }
+
+def create_carbon_store(backend: Optional[str] = None, path: Optional[Path] = None) -> CarbonStore:
+    """Build the configured store ("sqlite" by default, or "memory")"""
+    backend = backend or os.getenv("CARBON_STORE", "sqlite")
+    if backend == "memory":
+        return MemoryCarbonStore()
+    if backend == "sqlite":
+        return SQLiteCarbonStore(path or Path(os.getenv("CARBON_DB_PATH", str(CARBON_DB_PATH))))
+    raise ValueError(f"Unknown carbon store backend: {backend}")
@@ -0,0 +1,126 @@
+import csv
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Versioned tables written by data-pipeline/fetching/fetch_carbon.py, one file per version
+EMISSION_FACTORS_DIR = Path(__file__).parent.parent.parent / "data/raw/carbon/factors"
+FILE_PREFIX = "emission_factors_"
+
+TABLE_COLUMNS = ("activity", "component", "unit", "kg_co2e_per_unit", "period_days", "reference")
+
+def lifestyle_activities(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Split lifestyle survey inputs (carbon API fields) into activity quantities per day or period"""
+    miles = columns["daily_miles"]
+    transit = columns["public_transit_usage"]
+    ev = columns.get("electric_vehicle_usage", 0.0)
+    return {
+        "gasoline_car_miles": miles * (1 - transit - ev),
+        "public_transit_miles": miles * transit,
+        "electric_vehicle_miles": miles * ev,
+        "meat_kg": columns["meat_consumption"],
+        "dairy_kg": columns["dairy_consumption"],
+        "vegetables_kg": columns["vegetable_consumption"],
+        "electronics_purchases": columns["electronics_purchases"],
+        "clothing_purchases": columns["clothing_purchases"],
+        "furniture_purchases": columns["furniture_purchases"]
+    }
+
+class EmissionFactorTable:
+    """One version of the emission factors, evaluated per component.
+
+    Each component is the sum of quantity x kg_co2e_per_unit over its
+    activities (in table order), divided by their averaging period and then
+    rounded, so the columnar and single-row paths perform the same float
+    operations in the same order and agree exactly.
+    """
+
+    def __init__(self, version: str, rows: List[Dict[str, str]], source: str = "csv"):
+        self.version = version
+        self.source = source
+        self.rows = rows
+        self.activities: List[str] = []
+        self.components: List[str] = []
+        # component -> period_days -> [(activity, kg_co2e_per_unit)] in table order
+        self.terms: Dict[str, Dict[float, List[Tuple[str, float]]]] = {}
+        for row in rows:
+            if row["activity"] in self.activities:
+                raise ValueError(f"Duplicate activity '{row['activity']}' in emission factors {version}")
+            self.activities.append(row["activity"])
+            if row["component"] not in self.components:
+                self.components.append(row["component"])
+            periods = self.terms.setdefault(row["component"], {})
+            periods.setdefault(float(row["period_days"] or 1), []).append(
+                (row["activity"], float(row["kg_co2e_per_unit"]))
+            )
+
+    def evaluate(self, activities: Dict[str, np.ndarray], decimals: Optional[int] = 2) -> Dict[str, np.ndarray]:
+        """Daily kg CO2e per component (plus "total") for columnar activity quantities"""
+        n_rows = len(next(iter(activities.values())))
+        result = {}
+        for component in self.components:
+            value = np.zeros(n_rows, dtype=np.float64)
+            for period, factors in self.terms[component].items():
+                amount = np.zeros(n_rows, dtype=np.float64)
+                for activity, factor in factors:
+                    quantity = activities.get(activity)
+                    if quantity is not None:
+                        amount = amount + np.asarray(quantity, dtype=np.float64) * factor
+                value = value + amount / period
+            result[component] = np.round(value, decimals) if decimals is not None else value
+        result["total"] = sum(result[component] for component in self.components)
+        return result
+
+    def evaluate_row(self, activities: Dict[str, float], decimals: Optional[int] = 2) -> Dict[str, float]:
+        """evaluate() for one row of scalar quantities, without array overhead"""
+        components = {}
+        for component in self.components:
+            value = 0.0
+            for period, factors in self.terms[component].items():
+                amount = 0.0
+                for activity, factor in factors:
+                    quantity = activities.get(activity)
+                    if quantity is not None:
+                        amount = amount + quantity * factor
+                value = value + amount / period
+            # Same rounding as np.round (scale, round half to even, unscale); round(value, decimals) differs near halves
+            components[component] = round(value * 10.0 ** decimals) / 10.0 ** decimals if decimals is not None else value
+        components["total"] = sum(components.values())
+        return components
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "components": self.components,
+            "factors": [
+                {**row, "kg_co2e_per_unit": float(row["kg_co2e_per_unit"]), "period_days": float(row["period_days"] or 1)}
+                for row in self.rows
+            ]
+        }
+
+def available_versions(directory: Path = EMISSION_FACTORS_DIR) -> List[str]:
+    """Factor table versions on disk, oldest first"""
+    if not directory.exists():
+        return []
+    return sorted(path.stem[len(FILE_PREFIX):] for path in directory.glob(f"{FILE_PREFIX}*.csv"))
+
+def load_emission_factors(version: Optional[str] = None, directory: Path = EMISSION_FACTORS_DIR) -> EmissionFactorTable:
+    """Load one factor table version (default: EMISSION_FACTORS_VERSION, else the newest)"""
+    version = version or os.getenv("EMISSION_FACTORS_VERSION") or None
+    if version is None:
+        versions = available_versions(directory)
+        if not versions:
+            raise FileNotFoundError(f"No emission factor tables in {directory}")
+        version = versions[-1]
+
+    path = directory / f"{FILE_PREFIX}{version}.csv"
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = set(TABLE_COLUMNS) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"Emission factors {path.name} is missing columns: {sorted(missing)}")
+        rows = [{column: row[column] for column in TABLE_COLUMNS} for row in reader]
+    return EmissionFactorTable(version, rows, str(path))
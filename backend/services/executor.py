@@ -0,0 +1,142 @@
+import asyncio
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from utils.metrics import Histogram, LATENCY_BUCKETS_MS
+
+# Lane used for work submitted under a name that has no explicit config
+DEFAULT_LANE_CONFIG = {"kind": "thread", "max_concurrency": 4}
+
+class ExecutionLane:
+    """Bounded pool plus concurrency limit for one model's blocking work.
+
+    "thread" lanes suit libraries that release the GIL (XGBoost, TensorFlow,
+    torch, pandas I/O). "process" lanes suit GIL-bound pure-Python work; the
+    submitted callable and its arguments must then be picklable.
+    """
+
+    def __init__(self, name: str, kind: str = "thread", max_concurrency: int = 4):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown execution lane kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[Executor] = None
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.run_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_concurrency)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix=f"{self.name}-worker")
+        return self._pool
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the lane's pool without blocking the event loop.
+
+        The slot is held until fn itself returns, even if the caller is
+        cancelled first: a running thread cannot be interrupted, so freeing
+        its slot early would let the lane overcommit.
+        """
+        loop = asyncio.get_running_loop()
+        enqueued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.queue_wait_ms.observe((started_at - enqueued_at) * 1000)
+        self.running += 1
+        try:
+            future = self.pool.submit(partial(fn, *args, **kwargs))
+        except Exception:
+            self._finish(started_at, None)
+            raise
+
+        def done(_):
+            try:
+                loop.call_soon_threadsafe(self._finish, started_at, future)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                pass
+
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, started_at: float, future: Optional[Future]):
+        """Record how submitted work ended and free its slot (on the event loop)"""
+        self.running -= 1
+        if future is None or (not future.cancelled() and future.exception() is not None):
+            self.failed += 1
+        elif not future.cancelled():
+            self.completed += 1
+        self.run_ms.observe((time.perf_counter() - started_at) * 1000)
+        self.semaphore.release()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.waiting,
+            "in_flight": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "run_ms": self.run_ms.snapshot()
+        }
+
+class ModelExecutor:
+    """Routes blocking model work to per-model execution lanes"""
+
+    def __init__(self):
+        self._lanes: Dict[str, ExecutionLane] = {}
+
+    def configure(self, name: str, kind: str = "thread", max_concurrency: int = 4):
+        """Create or replace the lane for a model"""
+        if name in self._lanes:
+            self._lanes[name].shutdown()
+        self._lanes[name] = ExecutionLane(name, kind, max_concurrency)
+
+    def lane(self, name: str) -> ExecutionLane:
+        if name not in self._lanes:
+            self._lanes[name] = ExecutionLane(name, **DEFAULT_LANE_CONFIG)
+        return self._lanes[name]
+
+    async def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run blocking fn on the named model's lane"""
+        return await self.lane(name).run(fn, *args, **kwargs)
+
+    def shutdown(self):
+        for lane in self._lanes.values():
+            lane.shutdown()
+
+    def stats(self) -> Dict:
+        return {name: lane.stats() for name, lane in self._lanes.items()}
+
+# Shared executor used by the model routers
+model_executor = ModelExecutor()
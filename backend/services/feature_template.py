@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+import datetime
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TRAINING_DATA_PATH = Path(__file__).parent.parent.parent / "data/ml_ready/enhanced_training_dataset.csv"
+TEMPLATE_PATH = Path(__file__).parent.parent.parent / "data/ml_ready/feature_template.npz"
+
+# Request fields that map onto exact training columns
+EXACT_FIELD_COLUMNS = {
+    'main.temp': 'temperature',
+    'main.humidity': 'humidity',
+    'main.pressure': 'pressure',
+    'wind.speed': 'wind_speed'
+}
+
+# Request fields that fill every column containing the substring
+PATTERN_FIELD_COLUMNS = [
+    ('pm25', 'pm25'),
+    ('o3', 'o3')
+]
+
+REQUEST_FIELDS = list(EXACT_FIELD_COLUMNS.values()) + [field for _, field in PATTERN_FIELD_COLUMNS]
+
+def get_source_signature(path: Path) -> Optional[tuple]:
+    """Get (mtime_ns, size) of the training dataset, or None if missing"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def compute_template_arrays(training_data: pd.DataFrame):
+    """Compute ordered feature columns and median defaults from training data"""
+    numeric_cols = training_data.select_dtypes(include=['number']).columns.tolist()
+    feature_cols = [col for col in numeric_cols if col not in ['AQI']]
+    defaults = training_data[feature_cols].median().to_numpy(dtype=np.float64)
+    return feature_cols, defaults
+
+def save_template(path: Path, feature_cols: List[str], defaults: np.ndarray, signature: Optional[tuple]):
+    """Write template arrays to disk atomically (write temp file, then rename)"""
+    tmp_path = path.with_name(path.name + ".tmp.npz")
+    np.savez(
+        tmp_path,
+        columns=np.array(feature_cols, dtype=str),
+        defaults=defaults,
+        signature=np.array(signature if signature else (-1, -1), dtype=np.int64)
+    )
+    os.replace(tmp_path, path)
+
+class FeatureTemplate:
+    """Immutable serving template: feature order, median defaults and field index map"""
+
+    def __init__(self, feature_cols: List[str], defaults: np.ndarray,
+                 signature: Optional[tuple] = None, source: str = "csv", build_seconds: float = 0.0):
+        self.feature_cols = list(feature_cols)
+        self.defaults = np.ascontiguousarray(defaults, dtype=np.float64)
+        self.defaults.setflags(write=False)
+        self.signature = signature
+        self.source = source
+        self.build_seconds = build_seconds
+        self.built_at = datetime.datetime.now().isoformat()
+        self.field_index = self._build_field_index()
+
+    def _build_field_index(self) -> Dict[str, np.ndarray]:
+        """Map each request field to the column indices it fills"""
+        assigned = {field: [] for field in REQUEST_FIELDS}
+        for i, col in enumerate(self.feature_cols):
+            if col in EXACT_FIELD_COLUMNS:
+                assigned[EXACT_FIELD_COLUMNS[col]].append(i)
+                continue
+            for pattern, field in PATTERN_FIELD_COLUMNS:
+                if pattern in col.lower():
+                    assigned[field].append(i)
+                    break
+        return {
+            field: np.array(indices, dtype=np.intp)
+            for field, indices in assigned.items() if indices
+        }
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_cols)
+
+    @property
+    def nbytes(self) -> int:
+        return self.defaults.nbytes + sum(idx.nbytes for idx in self.field_index.values())
+
+    def create_vector(self, values: Dict[str, float]) -> np.ndarray:
+        """Create a feature vector from request field values"""
+        features = self.defaults.copy()
+        for field, indices in self.field_index.items():
+            features[indices] = values[field]
+        return features
+
+    def create_matrix(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Create a 2-D feature matrix (one row per input) from columnar field values"""
+        n_rows = len(columns[REQUEST_FIELDS[0]])
+        features = np.empty((n_rows, self.n_features), dtype=np.float64)
+        features[:] = self.defaults
+        for field, indices in self.field_index.items():
+            features[:, indices] = np.asarray(columns[field], dtype=np.float64)[:, None]
+        return features
+
+    def info(self) -> Dict:
+        """Summary for health reporting"""
+        return {
+            "source": self.source,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 4),
+            "n_features": self.n_features,
+            "size_bytes": self.nbytes
+        }
+
+class FeatureTemplateStore:
+    """Holds the current FeatureTemplate and swaps it when the training dataset changes"""
+
+    def __init__(self, data_path: Path = TRAINING_DATA_PATH, template_path: Path = TEMPLATE_PATH,
+                 check_interval: float = 5.0):
+        self.data_path = data_path
+        self.template_path = template_path
+        self.check_interval = check_interval
+        self._template: Optional[FeatureTemplate] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+    def _load_cached(self, signature: Optional[tuple]) -> Optional[FeatureTemplate]:
+        """Load the precomputed template if it was built from the current dataset"""
+        if signature is None or not self.template_path.exists():
+            return None
+        try:
+            start = time.perf_counter()
+            with np.load(self.template_path) as cached:
+                if tuple(cached["signature"].tolist()) != signature:
+                    return None
+                feature_cols = cached["columns"].tolist()
+                defaults = cached["defaults"]
+            return FeatureTemplate(feature_cols, defaults, signature, "npz", time.perf_counter() - start)
+        except Exception as e:
+            print(f"⚠️  Ignoring cached feature template: {e}")
+            return None
+
+    def _build(self, signature: Optional[tuple]) -> FeatureTemplate:
+        """Build a template from the training dataset and cache it on disk"""
+        cached = self._load_cached(signature)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        training_data = pd.read_csv(self.data_path, low_memory=False)
+        feature_cols, defaults = compute_template_arrays(training_data)
+        template = FeatureTemplate(feature_cols, defaults, signature, "csv", time.perf_counter() - start)
+
+        try:
+            save_template(self.template_path, feature_cols, defaults, signature)
+        except Exception as e:
+            print(f"⚠️  Could not cache feature template: {e}")
+        return template
+
+    def load(self) -> FeatureTemplate:
+        """Build (or load) the template and make it current"""
+        with self._lock:
+            signature = get_source_signature(self.data_path)
+            template = self._build(signature)
+            self._template = template
+            self._last_check = time.monotonic()
+        return template
+
+    def _rebuild(self):
+        try:
+            template = self.load()
+            print(f"✅ Feature template rebuilt ({template.n_features} features, {template.source})")
+        except Exception as e:
+            print(f"❌ Error rebuilding feature template: {e}")
+
+    def rebuild_in_background(self):
+        """Start a rebuild on a daemon thread unless one is already running"""
+        with self._rebuild_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self._rebuild, name="feature-template-rebuild", daemon=True)
+            self._rebuild_thread.start()
+
+    def get(self) -> FeatureTemplate:
+        """Get the current template; a changed dataset is rebuilt in the background.
+
+        Called from request handlers, so it never reads the CSV itself: the
+        template is built by load() at startup and readers keep using the old
+        one until a rebuild has finished.
+        """
+        template = self._template
+        if template is None:
+            self.rebuild_in_background()
+            raise RuntimeError("Feature template not loaded yet")
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            signature = get_source_signature(self.data_path)
+            if signature is not None and signature != template.signature:
+                self.rebuild_in_background()
+        return template
+
+    def info(self) -> Dict:
+        """Summary of the current template for /health"""
+        if self._template is None:
+            return {"loaded": False}
+        return {"loaded": True, **self._template.info()}
+
+# Shared store used by the model routers
+feature_templates = FeatureTemplateStore()
@@ -0,0 +1,40 @@
+def conv1d_to_linear(model) -> int:
+    """Replace GPT-2's Conv1D projections with equivalent nn.Linear layers in place; returns the count.
+
+    Dynamic quantization only rewrites nn.Linear, and GPT-2 implements its
+    attention and MLP projections as transformers' Conv1D (weight stored as
+    in x out), so without this only the LM head would be quantized.
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    replaced = 0
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if not isinstance(child, Conv1D):
+                continue
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            with torch.no_grad():
+                linear.weight.copy_(child.weight.t())
+                linear.bias.copy_(child.bias)
+            setattr(parent, name, linear)
+            replaced += 1
+    return replaced
+
+def quantize_dynamic_int8(model):
+    """Dynamic int8 quantization of every linear projection for CPU inference"""
+    import torch
+
+    conv1d_to_linear(model)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def model_size_bytes(model) -> int:
+    """Serialized state_dict size, which reflects packed int8 weights"""
+    import io
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
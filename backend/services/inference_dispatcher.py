@@ -0,0 +1,136 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.metrics import Histogram, LATENCY_BUCKETS_MS, BATCH_SIZE_BUCKETS
+from services.executor import ModelExecutor, model_executor
+
+class BatchDispatcher:
+    """Queues concurrent inference requests for one model and runs them as a single batch.
+
+    A batch is flushed when it reaches max_batch_size or when the oldest queued
+    request has waited max_wait_ms. batch_fn receives the list of queued items
+    and must return a sequence of results in the same order. When an executor
+    is given, batch_fn runs on the executor lane of the same name.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0, enabled: bool = True,
+                 executor: Optional[ModelExecutor] = None):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.enabled = enabled
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = set()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    def configure(self, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None,
+                  enabled: Optional[bool] = None):
+        """Update batching parameters"""
+        if max_batch_size is not None:
+            self.max_batch_size = max(1, int(max_batch_size))
+        if max_wait_ms is not None:
+            self.max_wait_ms = max(0.0, float(max_wait_ms))
+        if enabled is not None:
+            self.enabled = enabled
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its slice of the batch result"""
+        if not self.enabled or self.max_batch_size <= 1:
+            self.batch_sizes.observe(1)
+            self.queue_wait_ms.observe(0.0)
+            return (await self._call([item]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    async def _call(self, items: List[Any]) -> Sequence[Any]:
+        if self.executor is None:
+            return self.batch_fn(items)
+        return await self.executor.run(self.name, self.batch_fn, items)
+
+    def _flush(self):
+        """Start running the queued items as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        # Callers that were cancelled while queued don't need a result
+        batch = [entry for entry in batch if not entry[1].cancelled()]
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.queue_wait_ms.observe((now - enqueued_at) * 1000)
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[tuple]):
+        """Run one batch and resolve each caller's future with its result"""
+        try:
+            results = await self._call([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Batching configuration and histograms"""
+        return {
+            "enabled": self.enabled,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queued": len(self._pending),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
+
+class DispatcherRegistry:
+    """Named BatchDispatchers shared across routers"""
+
+    def __init__(self, executor: Optional[ModelExecutor] = None):
+        self.executor = executor
+        self._dispatchers: Dict[str, BatchDispatcher] = {}
+
+    def register(self, name: str, batch_fn: Callable[[List[Any]], Sequence[Any]], **config) -> BatchDispatcher:
+        """Create (or replace) the dispatcher for a model"""
+        dispatcher = BatchDispatcher(name, batch_fn, executor=self.executor, **config)
+        self._dispatchers[name] = dispatcher
+        return dispatcher
+
+    def configure(self, name: str, **config):
+        """Apply per-model batching config, ignoring unknown models"""
+        if name in self._dispatchers:
+            self._dispatchers[name].configure(**config)
+
+    def get(self, name: str) -> Optional[BatchDispatcher]:
+        return self._dispatchers.get(name)
+
+    def stats(self) -> Dict:
+        return {name: dispatcher.stats() for name, dispatcher in self._dispatchers.items()}
+
+# Shared registry used by the model routers
+dispatchers = DispatcherRegistry(executor=model_executor)
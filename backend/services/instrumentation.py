@@ -0,0 +1,65 @@
+import time
+
+from utils.metrics import metrics_registry
+
+http_request_ms = metrics_registry.histogram(
+    "http_request_duration_milliseconds",
+    "Request latency by route template, including streamed bodies",
+    ("method", "route")
+)
+http_responses = metrics_registry.counter(
+    "http_responses_total",
+    "Responses by route template and status code",
+    ("method", "route", "status")
+)
+http_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled"
+)
+
+# Prefix each router was included under, keyed by route object id
+_route_prefixes = {}
+
+def register_route_prefix(router, prefix: str):
+    """Remember a router's include prefix so route labels carry the full path"""
+    for route in router.routes:
+        _route_prefixes[id(route)] = prefix
+
+def route_template(scope) -> str:
+    """Route path template (e.g. /api/v1/alerts/current/{location}) so labels stay low-cardinality"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    # FastAPI versions that copy included routes already store the full path
+    prefix = _route_prefixes.get(id(route), "")
+    return path if path.startswith(prefix + "/") else prefix + path
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            # The router fills in scope["route"] while handling the request
+            method, route = scope["method"], route_template(scope)
+            http_request_ms.labels(method, route).observe((time.perf_counter() - start) * 1000)
+            http_responses.inc(method, route, str(status))
@@ -0,0 +1,116 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from utils.metrics import metrics_registry
+
+loop_lag_ms = metrics_registry.histogram(
+    "event_loop_lag_milliseconds",
+    "Delay between when the lag probe was due and when the event loop ran it",
+    ()
+).labels()
+loop_lag_quantiles = metrics_registry.gauge(
+    "event_loop_lag_quantile_milliseconds",
+    "Event loop lag percentiles over the recent probe window",
+    ("quantile",)
+)
+loop_stalls = metrics_registry.counter(
+    "event_loop_stalls_total",
+    "Times the event loop was blocked longer than the stall threshold"
+)
+
+LAG_QUANTILES = (0.5, 0.9, 0.99)
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling lag and captures what blocked it.
+
+    A probe coroutine sleeps for interval_ms and records how late it woke up.
+    A watchdog thread notices when the probe has not run for stall_ms and
+    grabs the event-loop thread's stack at that moment, which points at the
+    synchronous call that is holding the loop.
+    """
+
+    def __init__(self, interval_ms: float = 100.0, stall_ms: float = 250.0,
+                 window: int = 1000, max_stalls: int = 50):
+        self.interval = interval_ms / 1000
+        self.stall_ms = stall_ms
+        self.recent_lag: deque = deque(maxlen=window)
+        self.stalls: deque = deque(maxlen=max_stalls)
+        self._last_tick = time.perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._open_stall: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        metrics_registry.add_collector(self.publish_quantiles)
+
+    async def _probe(self):
+        while True:
+            scheduled = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag_ms = max(0.0, (now - scheduled - self.interval) * 1000)
+            self._last_tick = now
+            self.recent_lag.append(lag_ms)
+            loop_lag_ms.observe(lag_ms)
+
+            stall = self._open_stall
+            if stall is not None:
+                # The watchdog saw this stall start; record how long it lasted
+                stall["duration_ms"] = round(lag_ms + self.interval * 1000, 1)
+                self._open_stall = None
+
+    def _watch(self):
+        while not self._stop.wait(self.stall_ms / 4000):
+            blocked_ms = (time.perf_counter() - self._last_tick - self.interval) * 1000
+            if blocked_ms < self.stall_ms or self._open_stall is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            stall = {
+                "detected_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "duration_ms": None,
+                "stack": traceback.format_stack(frame) if frame is not None else []
+            }
+            self._open_stall = stall
+            self.stalls.append(stall)
+            loop_stalls.inc()
+
+    def start(self):
+        """Start probing the running event loop"""
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def quantiles(self) -> Dict[str, float]:
+        if not self.recent_lag:
+            return {str(q): 0.0 for q in LAG_QUANTILES}
+        values = np.percentile(np.fromiter(self.recent_lag, dtype=np.float64), [q * 100 for q in LAG_QUANTILES])
+        return {str(q): round(float(v), 3) for q, v in zip(LAG_QUANTILES, values)}
+
+    def publish_quantiles(self):
+        for quantile, value in self.quantiles().items():
+            loop_lag_quantiles.set(value, quantile)
+
+    def stats(self) -> Dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.stall_ms,
+            "lag_ms": {**self.quantiles(), "max": round(max(self.recent_lag, default=0.0), 3)},
+            "stalls_total": int(loop_stalls.values.get((), 0)),
+            "recent_stalls": list(self.stalls)
+        }
@@ -0,0 +1,77 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, List
+
+LSTM_EXPORT_PATH = Path(__file__).parent.parent.parent / "models/lstm_model.npz"
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # exp(-log(1 + e^-x)) never overflows, unlike 1 / (1 + e^-x) for large negative x
+    return np.exp(-np.logaddexp(0, -x))
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "relu": lambda x: np.maximum(x, 0),
+    "linear": lambda x: x
+}
+
+class NumpyLSTMModel:
+    """Keras-compatible predict() for an exported LSTM/Dense stack, using only NumPy.
+
+    The export written by data-pipeline/training/export_lstm.py stores each
+    layer's config and weights; gate order follows Keras (input, forget,
+    cell, output).
+    """
+
+    def __init__(self, layers: List[Dict]):
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path: Path = LSTM_EXPORT_PATH) -> "NumpyLSTMModel":
+        with np.load(path) as exported:
+            specs = json.loads(str(exported["config"]))
+            layers = []
+            for i, spec in enumerate(specs):
+                weights = {
+                    key[len(f"layer{i}_"):]: exported[key].astype(np.float32)
+                    for key in exported.files if key.startswith(f"layer{i}_")
+                }
+                for name in ("activation", "recurrent_activation"):
+                    if name in spec and spec[name] not in ACTIVATIONS:
+                        raise ValueError(f"Unsupported activation: {spec[name]}")
+                layers.append({**spec, **weights})
+        return cls(layers)
+
+    def _lstm(self, layer: Dict, x: np.ndarray) -> np.ndarray:
+        activation = ACTIVATIONS[layer["activation"]]
+        recurrent_activation = ACTIVATIONS[layer["recurrent_activation"]]
+        units = layer["units"]
+        n_samples, n_steps, _ = x.shape
+
+        # Input projections for every timestep in one matmul; only the recurrence loops
+        projected = x @ layer["kernel"] + layer["bias"]
+        h = np.zeros((n_samples, units), dtype=np.float32)
+        c = np.zeros((n_samples, units), dtype=np.float32)
+        outputs = []
+        for t in range(n_steps):
+            z = projected[:, t, :] + h @ layer["recurrent_kernel"]
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if layer["return_sequences"]:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if layer["return_sequences"] else h
+
+    def predict(self, x: np.ndarray, verbose: int = 0, batch_size=None) -> np.ndarray:
+        """Run the network on a (samples, timesteps, features) array"""
+        out = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            if layer["type"] == "lstm":
+                out = self._lstm(layer, out)
+            else:
+                out = ACTIVATIONS[layer["activation"]](out @ layer["kernel"] + layer["bias"])
+        return out
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+MODEL_MODES = ("eager", "lazy", "disabled")
+
+class ManagedModel:
+    """Load state for one model"""
+
+    def __init__(self, name: str, loader: Callable[[], Any], mode: str = "eager"):
+        if mode not in MODEL_MODES:
+            raise ValueError(f"Unknown model mode for {name}: {mode}")
+        self.name = name
+        self.loader = loader
+        self.mode = mode
+        self.state = "disabled" if mode == "disabled" else "not_loaded"
+        self.load_seconds: Optional[float] = None
+        self.loaded_at: Optional[str] = None
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def status(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "state": self.state,
+            "ready": self.state == "ready",
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "loaded_at": self.loaded_at,
+            "error": self.error
+        }
+
+def _load_succeeded(result: Any) -> bool:
+    # Loaders return None (or a tuple of Nones) when loading fails
+    if isinstance(result, tuple):
+        return all(part is not None for part in result)
+    return result is not None
+
+class ModelManager:
+    """Loads independent models concurrently at startup or lazily on first use"""
+
+    def __init__(self):
+        self._models: Dict[str, ManagedModel] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], mode: str = "eager"):
+        """Register a model loader; loaders import their heavy frameworks themselves"""
+        self._models[name] = ManagedModel(name, loader, mode)
+
+    def _load(self, name: str) -> bool:
+        """Run one model's loader (at most once at a time per model)"""
+        model = self._models[name]
+        with model.lock:
+            if model.state == "ready":
+                return True
+            model.state = "loading"
+            start = time.perf_counter()
+            try:
+                loaded = _load_succeeded(model.loader())
+                model.error = None if loaded else "loader returned no model"
+            except Exception as e:
+                loaded = False
+                model.error = str(e)
+            model.load_seconds = time.perf_counter() - start
+            model.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+            model.state = "ready" if loaded else "failed"
+            return loaded
+
+    async def start(self):
+        """Load every eager model concurrently"""
+        eager = [name for name, model in self._models.items() if model.mode == "eager"]
+        if not eager:
+            return
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=len(eager), thread_name_prefix="model-loader") as pool:
+            await asyncio.gather(*(loop.run_in_executor(pool, self._load, name) for name in eager))
+
+    async def ensure_loaded(self, name: str) -> bool:
+        """Return whether a model is ready, loading it first if it is lazy"""
+        model = self._models.get(name)
+        if model is None or model.mode == "disabled":
+            return False
+        if model.state == "ready":
+            return True
+        if model.mode == "lazy" and model.state != "failed":
+            return await asyncio.get_running_loop().run_in_executor(None, self._load, name)
+        return False
+
+    def is_ready(self) -> bool:
+        """True when every eager model has loaded"""
+        return all(model.state == "ready" for model in self._models.values() if model.mode == "eager")
+
+    def ready_count(self) -> int:
+        return sum(model.state == "ready" for model in self._models.values())
+
+    def status(self) -> Dict:
+        return {name: model.status() for name, model in self._models.items()}
+
+# Shared manager used by main.py and the model routers
+model_manager = ModelManager()
@@ -0,0 +1,145 @@
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+# Leaf frames from these stdlib modules mean a worker thread is idle, not working
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples Python stacks of every thread on an interval while running.
+
+    Produces collapsed stacks ("root;child;leaf count"), the input format of
+    flamegraph.pl and speedscope. The event-loop thread is always sampled;
+    other threads (executor lanes running model calls) only when busy.
+    """
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._loop_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        own_thread = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if thread_id != self._loop_thread and frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(format_frame(frame))
+                    frame = frame.f_back
+                thread_name = "event-loop" if thread_id == self._loop_thread else names.get(thread_id, str(thread_id))
+                stack.append(thread_name)
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class ProfileStore:
+    """Keeps the most recent collapsed-stack profiles on disk"""
+
+    def __init__(self, directory: Path, max_profiles: int = 50):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def save(self, profile_id: str, content: str, header: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.collapsed").write_text(f"# {header}\n{content}")
+        for old in self.list()[self.max_profiles:]:
+            (self.directory / f"{old['id']}.collapsed").unlink(missing_ok=True)
+
+    def list(self) -> List[Dict]:
+        """Stored profiles, newest first"""
+        if not self.directory.exists():
+            return []
+        paths = sorted(self.directory.glob("*.collapsed"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [{"id": path.stem, "header": path.read_text().split("\n", 1)[0].lstrip("# ")} for path in paths]
+
+    def load(self, profile_id: str) -> Optional[str]:
+        path = self.directory / f"{Path(profile_id).name}.collapsed"
+        return path.read_text() if path.exists() else None
+
+def is_operator(token: Optional[str], expected: str) -> bool:
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+class ProfilingMiddleware:
+    """Runs a request under the sampling profiler when an operator asks for it.
+
+    Triggered by an "X-Profile: 1" header or "?profile=1" query flag together
+    with a valid X-Operator-Token. The response carries X-Profile-Id; fetch
+    the stored profile from /profiles/{id}. One request is profiled at a
+    time; others run normally. Only installed when profiling is enabled, so
+    untriggered requests pay nothing when it is off.
+    """
+
+    def __init__(self, app, store: ProfileStore, token: str, interval_ms: float = 5.0):
+        self.app = app
+        self.store = store
+        self.token = token
+        self.interval_ms = interval_ms
+        self._busy = threading.Lock()
+
+    @staticmethod
+    def requested(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile" and value in (b"1", b"true"):
+                return True
+        query = scope.get("query_string", b"")
+        return b"profile" in query and parse_qs(query.decode()).get("profile", [""])[0] in ("1", "true")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.requested(scope):
+            return await self.app(scope, receive, send)
+
+        token = dict(scope["headers"]).get(b"x-operator-token", b"").decode() or None
+        if not is_operator(token, self.token) or not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex[:12]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        profiler = SamplingProfiler(self.interval_ms)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            self._busy.release()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            header = f"{scope['method']} {scope['path']} {elapsed_ms:.1f}ms {profiler.samples} samples"
+            try:
+                self.store.save(profile_id, profiler.collapsed(), header)
+            except Exception as e:
+                print(f"⚠️  Could not save profile {profile_id}: {e}")
@@ -0,0 +1,118 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+class TDigest:
+    """Merging t-digest: a mergeable streaming sketch of a distribution's quantiles.
+
+    Values are buffered and periodically merged into at most about
+    compression/2 centroids, kept small near the tails (k1 scale function)
+    so extreme percentiles stay accurate. Rank and quantile queries
+    interpolate between centroids, so they cost O(log centroids) no matter
+    how many values were added.
+    """
+
+    def __init__(self, compression: float = 200.0, buffer_size: int = 100):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[float] = []
+        # Interpolation knots (value, rank fraction), rebuilt after each merge
+        self._knot_values = np.empty(0, dtype=np.float64)
+        self._knot_ranks = np.empty(0, dtype=np.float64)
+
+    def add(self, value: float):
+        self._buffer.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self.buffer_size:
+            self.compress()
+
+    def add_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not values.size:
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        buffered = np.asarray(self._buffer, dtype=np.float64)
+        self._buffer.clear()
+        self._merge(
+            np.concatenate([self.means, buffered, values]),
+            np.concatenate([self.weights, np.ones(buffered.size + values.size)])
+        )
+
+    def compress(self):
+        """Merge buffered values into the centroids"""
+        if not self._buffer:
+            return
+        buffered = np.asarray(self._buffer, dtype=np.float64)
+        self._buffer.clear()
+        self._merge(np.concatenate([self.means, buffered]), np.concatenate([self.weights, np.ones(buffered.size)]))
+
+    def _merge(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / cumulative[-1]
+        # Centroids whose midpoints share an integer step of k(q) merge into one
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q_mid - 1, -1, 1))
+        cluster = np.floor(k)
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+        centers = (np.cumsum(self.weights) - self.weights / 2) / self.count
+        self._knot_values = np.r_[self.min, self.means, self.max]
+        self._knot_ranks = np.r_[0.0, centers, 1.0]
+
+    def cdf(self, value: float) -> float:
+        """Approximate mid-rank of value: the fraction of added values below it plus half of those equal to it"""
+        self.compress()
+        if not self.count:
+            return math.nan
+        # Centroids whose mean is exactly value hold tied values; count half of them
+        lo = int(np.searchsorted(self.means, value, side="left"))
+        hi = int(np.searchsorted(self.means, value, side="right"))
+        if hi > lo:
+            below = float(self.weights[:lo].sum())
+            return (below + float(self.weights[lo:hi].sum()) / 2) / self.count
+        return float(np.interp(value, self._knot_values, self._knot_ranks))
+
+    def quantile(self, q: float) -> float:
+        """Approximate value at rank fraction q (0-1)"""
+        self.compress()
+        if not self.count:
+            return math.nan
+        return float(np.interp(q, self._knot_ranks, self._knot_values))
+
+    @property
+    def n_centroids(self) -> int:
+        return self.means.size + len(self._buffer)
+
+    def to_state(self) -> Tuple[int, float, float, bytes, bytes]:
+        """(count, min, max, means, weights) with buffered values as unit-weight centroids"""
+        means = np.concatenate([self.means, np.asarray(self._buffer, dtype=np.float64)])
+        weights = np.concatenate([self.weights, np.ones(len(self._buffer))])
+        return self.count, self.min, self.max, means.tobytes(), weights.tobytes()
+
+    @classmethod
+    def from_state(cls, state: Optional[Tuple[int, float, float, bytes, bytes]], **kwargs) -> "TDigest":
+        digest = cls(**kwargs)
+        if state is None or not state[0]:
+            return digest
+        count, minimum, maximum, means, weights = state
+        digest.count, digest.min, digest.max = int(count), float(minimum), float(maximum)
+        digest._merge(np.frombuffer(means, dtype=np.float64), np.frombuffer(weights, dtype=np.float64))
+        return digest
+
+    def info(self) -> Dict:
+        return {"count": self.count, "centroids": self.n_centroids, "compression": self.compression}
@@ -0,0 +1,238 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, List
+
+# Rows evaluated per kernel pass; bounds the (rows x trees) node-index matrix
+ROW_CHUNK = 2048
+
+class CompiledTreeEnsemble:
+    """Flat array representation of a tree ensemble evaluated with NumPy.
+
+    All trees share one set of node arrays. Leaves point to themselves, so
+    every row walks every tree for exactly max_depth steps with no branching
+    on leaf status. A split sends a row left when x < threshold (XGBoost) or
+    x <= threshold (scikit-learn); NaN follows default_left.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 n_features: int, base_score: float = 0.0, scale: float = 1.0, inclusive: bool = False):
+        self.feature = feature.astype(np.intp)
+        self.threshold = threshold.astype(np.float64)
+        self.left = left.astype(np.intp)
+        self.right = right.astype(np.intp)
+        self.default_left = default_left.astype(bool)
+        self.value = value.astype(np.float64)
+        self.roots = roots.astype(np.intp)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.base_score = float(base_score)
+        self.scale = float(scale)
+        self.inclusive = bool(inclusive)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right,
+                                      self.default_left, self.value, self.roots))
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            if self.inclusive:
+                go_left = x <= self.threshold[nodes]
+            else:
+                go_left = x < self.threshold[nodes]
+            go_left = np.where(np.isnan(x), self.default_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].sum(axis=1) * self.scale + self.base_score
+
+    def predict(self, X) -> np.ndarray:
+        """Predict for a 2-D (rows, features) input"""
+        # Both libraries compare float32 inputs against their split values
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+        if len(X) <= ROW_CHUNK:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[i:i + ROW_CHUNK]) for i in range(0, len(X), ROW_CHUNK)])
+
+    def save(self, path: Path):
+        np.savez(
+            path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, value=self.value, roots=self.roots,
+            meta=np.array(json.dumps({
+                "max_depth": self.max_depth, "n_features": self.n_features, "base_score": self.base_score,
+                "scale": self.scale, "inclusive": self.inclusive
+            }))
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "CompiledTreeEnsemble":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {key: data[key] for key in data.files if key != "meta"}
+        return cls(**arrays, **meta)
+
+class _FlatTreeBuilder:
+    """Accumulates nodes of several trees into shared flat arrays"""
+
+    def __init__(self):
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.default_left: List[bool] = []
+        self.value: List[float] = []
+        self.roots: List[int] = []
+        self.max_depth = 0
+
+    def add_node(self) -> int:
+        self.feature.append(0)
+        self.threshold.append(0.0)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.default_left.append(True)
+        self.value.append(0.0)
+        return len(self.feature) - 1
+
+    def set_leaf(self, node: int, value: float):
+        self.left[node] = node
+        self.right[node] = node
+        self.value[node] = value
+
+    def set_split(self, node: int, feature: int, threshold: float, left: int, right: int, default_left: bool):
+        self.feature[node] = feature
+        self.threshold[node] = threshold
+        self.left[node] = left
+        self.right[node] = right
+        self.default_left[node] = default_left
+
+    def build(self, **kwargs) -> CompiledTreeEnsemble:
+        return CompiledTreeEnsemble(
+            np.array(self.feature), np.array(self.threshold), np.array(self.left), np.array(self.right),
+            np.array(self.default_left), np.array(self.value), np.array(self.roots),
+            self.max_depth, **kwargs
+        )
+
+def _parse_base_score(raw) -> float:
+    # XGBoost >= 3 stores base_score as a vector string, e.g. "[3.29E1]"
+    return float(str(raw).strip("[]").split(",")[0])
+
+def compile_xgboost(model) -> CompiledTreeEnsemble:
+    """Compile an XGBRegressor (or Booster) with a gbtree booster"""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    config = json.loads(booster.save_config())
+    learner = config["learner"]
+    # dart scales each tree by a weight the JSON dump leaves out, so only plain gbtree is compiled
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError(f"Only gbtree boosters can be compiled, not {learner['gradient_booster']['name']}")
+    if not learner["objective"]["name"].startswith("reg:squarederror"):
+        raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+
+    feature_names = booster.feature_names
+    feature_index: Dict[str, int] = (
+        {name: i for i, name in enumerate(feature_names)} if feature_names else {}
+    )
+    builder = _FlatTreeBuilder()
+
+    def add_tree(tree: Dict, depth: int) -> int:
+        node = builder.add_node()
+        if "leaf" in tree:
+            builder.set_leaf(node, tree["leaf"])
+            builder.max_depth = max(builder.max_depth, depth)
+            return node
+        children = {child["nodeid"]: child for child in tree["children"]}
+        left = add_tree(children[tree["yes"]], depth + 1)
+        right = add_tree(children[tree["no"]], depth + 1)
+        split = tree["split"]
+        feature = feature_index[split] if split in feature_index else int(split.lstrip("f"))
+        builder.set_split(node, feature, np.float32(tree["split_condition"]), left, right,
+                          tree["missing"] == tree["yes"])
+        return node
+
+    for dump in booster.get_dump(dump_format="json"):
+        builder.roots.append(add_tree(json.loads(dump), 0))
+
+    return builder.build(
+        n_features=booster.num_features(),
+        base_score=_parse_base_score(learner["learner_model_param"]["base_score"]),
+        inclusive=False
+    )
+
+def compile_sklearn_forest(model) -> CompiledTreeEnsemble:
+    """Compile a fitted scikit-learn RandomForestRegressor (single output)"""
+    builder = _FlatTreeBuilder()
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        if tree.n_outputs != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        offset = len(builder.feature)
+        missing_left = getattr(tree, "missing_go_to_left", None)
+        for i in range(tree.node_count):
+            node = builder.add_node()
+            if tree.children_left[i] == -1:
+                builder.set_leaf(node, tree.value[i, 0, 0])
+            else:
+                builder.set_split(
+                    node, tree.feature[i], tree.threshold[i],
+                    offset + tree.children_left[i], offset + tree.children_right[i],
+                    bool(missing_left[i]) if missing_left is not None else True
+                )
+        builder.roots.append(offset)
+        builder.max_depth = max(builder.max_depth, tree.max_depth)
+
+    return builder.build(
+        n_features=model.n_features_in_,
+        scale=1.0 / len(model.estimators_),
+        inclusive=True
+    )
+
+class TreeEnsemblePredictor:
+    """Serves small inputs from the compiled ensemble and large ones from the native model.
+
+    The compiled kernel avoids per-call library overhead, which dominates for a
+    handful of rows; the native multi-threaded predictor wins on big batches.
+    """
+
+    def __init__(self, native_model, compiled: CompiledTreeEnsemble, max_compiled_rows: int = 256):
+        self.native_model = native_model
+        self.compiled = compiled
+        self.max_compiled_rows = max_compiled_rows
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X)
+        if len(X) <= self.max_compiled_rows:
+            return self.compiled.predict(X)
+        return self.native_model.predict(X)
+
+    def __getattr__(self, name):
+        return getattr(self.native_model, name)
+
+def check_equivalence(native_model, compiled: CompiledTreeEnsemble, n_rows: int = 256,
+                      scale: float = 100.0, seed: int = 0) -> float:
+    """Max abs difference between native and compiled predictions on random inputs (with NaNs)"""
+    rng = np.random.default_rng(seed)
+    X = (rng.standard_normal((n_rows, compiled.n_features)) * scale).astype(np.float32)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return float(np.max(np.abs(np.asarray(native_model.predict(X), dtype=np.float64) - compiled.predict(X))))
+
+def compile_for_serving(native_model, kind: str, tolerance: float = 1e-3, max_compiled_rows: int = 256):
+    """Compile a loaded model and wrap it, falling back to the native model on any mismatch"""
+    try:
+        compiled = compile_xgboost(native_model) if kind == "xgboost" else compile_sklearn_forest(native_model)
+        diff = check_equivalence(native_model, compiled)
+        if diff > tolerance:
+            print(f"⚠️  Compiled {kind} model differs from native by {diff:.2e}; serving native model")
+            return native_model
+        print(f"✅ Compiled {kind} ensemble ({compiled.n_trees} trees, depth {compiled.max_depth}, max diff {diff:.1e})")
+        return TreeEnsemblePredictor(native_model, compiled, max_compiled_rows)
+    except Exception as e:
+        print(f"⚠️  Could not compile {kind} model: {e}")
+        return native_model
@@ -79,5 +79,9 @@ API_CONFIG = {
     "max_forecast_hours": 24,
     "max_history_days": 365,
     "default_page_size": 50,
-    "max_page_size": 100
+    "max_page_size": 100,
+    "max_batch_size": 50000,
+    "max_carbon_batch_size": 500000,
+    "max_carbon_scenarios": 200000,
+    "forecast_stream_chunk": 256
 }
\ No newline at end of file
@@ -0,0 +1,206 @@
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Default latency buckets in milliseconds
+LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Default batch-size buckets
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts reported per upper bound).
+
+    Observed from lane worker threads and read by /metrics, so updates and
+    reads take a lock and a read never mixes counts from different moments.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets: List[float] = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation"""
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def state(self) -> Tuple[List[int], int, float]:
+        """Consistent copy of (per-bucket counts, count, sum)"""
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts plus count and sum"""
+        counts, count, total = self.state()
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+            running += bucket_count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "count": count,
+            "sum": round(total, 4),
+            "mean": round(total / count, 4) if count else 0.0,
+            "buckets": cumulative
+        }
+
+def _format_labels(label_names: Sequence[str], label_values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class LabeledHistogram:
+    """One Histogram per label combination, rendered as a Prometheus histogram"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self.series: Dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        histogram = self.series.get(values)
+        if histogram is None:
+            with self._lock:
+                histogram = self.series.get(values)
+                if histogram is None:
+                    histogram = self.series[values] = Histogram(self.buckets)
+        return histogram
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self.series.items())
+        for values, histogram in series:
+            counts, count, total = histogram.state()
+            running = 0
+            for bound, bucket_count in zip(histogram.buckets + [float("inf")], counts):
+                running += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.label_names, values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class LabeledValue:
+    """Counter or gauge keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), kind: str = "counter"):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.kind = kind
+        self.values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self.values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values_now = sorted(self.values.items())
+        for values, value in values_now:
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics plus collector callbacks, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List = []
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> LabeledHistogram:
+        if name not in self.metrics:
+            self.metrics[name] = LabeledHistogram(name, help_text, label_names, buckets)
+        return self.metrics[name]
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> LabeledValue:
+        if name not in self.metrics:
+            self.metrics[name] = LabeledValue(name, help_text, label_names, "counter")
+        return self.metrics[name]
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> LabeledValue:
+        if name not in self.metrics:
+            self.metrics[name] = LabeledValue(name, help_text, label_names, "gauge")
+        return self.metrics[name]
+
+    def add_collector(self, collect):
+        """Register a callable run before each render (e.g. to refresh gauges)"""
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class PhaseTimer:
+    """Context manager that records elapsed milliseconds into a histogram"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+        return False
+
+# Shared registry exposed at /metrics
+metrics_registry = MetricsRegistry()
+
+model_phase_ms = metrics_registry.histogram(
+    "model_phase_duration_milliseconds",
+    "Time spent per model in feature building vs inference",
+    ("model", "phase")
+)
+
+def time_model_phase(model: str, phase: str) -> PhaseTimer:
+    """Time a block as the feature-building or inference phase of a model"""
+    return PhaseTimer(model_phase_ms.labels(model, phase))
+
+def timed_model_phase(model: str, phase: str) -> Callable:
+    """Decorator form of time_model_phase for functions that are one whole phase"""
+    histogram = model_phase_ms.labels(model, phase)
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with PhaseTimer(histogram):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -12,6 +12,8 @@ load_dotenv()
 
 RAW_DIR = Path(__file__).resolve().parent.parent.parent / "data/raw/carbon"
 RAW_DIR.mkdir(parents=True, exist_ok=True)
+# Kept in a subdirectory so preprocess does not merge the factor table as location data
+FACTORS_DIR = RAW_DIR / "factors"
 
 # API Keys (set in .env file)
 EPA_EMISSIONS_API_KEY = os.getenv("EPA_EMISSIONS_API_KEY", "")
@@ -258,6 +260,34 @@ def fetch_consumer_product_emissions():
     
     return pd.DataFrame()
 
+def fetch_emission_factors():
+    """Write the versioned emission factor table shared by the API and preprocessing"""
+    today = datetime.date.today()
+    
+    # kg CO2e per unit; period_days spreads per-period quantities (monthly purchases) over days
+    emission_factors = [
+        ("gasoline_car_miles", "transportation", "mile", 0.4, 1, "EPA average passenger vehicle"),
+        ("public_transit_miles", "transportation", "passenger mile", 0.1, 1, "Average bus and rail"),
+        ("electric_vehicle_miles", "transportation", "mile", 0.05, 1, "US grid average charging"),
+        ("meat_kg", "food", "kg", 25.0, 1, "Mixed meat diet"),
+        ("dairy_kg", "food", "kg", 10.0, 1, "Mixed dairy"),
+        ("vegetables_kg", "food", "kg", 2.0, 1, "Vegetables"),
+        ("electricity_kwh", "energy", "kWh", 0.4, 1, "US grid average"),
+        ("electronics_purchases", "consumer", "purchase", 200.0, 30, "Laptop-class device"),
+        ("clothing_purchases", "consumer", "purchase", 50.0, 30, "Clothing item"),
+        ("furniture_purchases", "consumer", "purchase", 300.0, 30, "Furniture item"),
+    ]
+    
+    df = pd.DataFrame(
+        emission_factors,
+        columns=["activity", "component", "unit", "kg_co2e_per_unit", "period_days", "reference"]
+    )
+    FACTORS_DIR.mkdir(parents=True, exist_ok=True)
+    out_file = FACTORS_DIR / f"emission_factors_{today}.csv"
+    df.to_csv(out_file, index=False)
+    print(f"[INFO] Emission factor table saved → {out_file}")
+    return df
+
 def fetch_all_carbon_data():
     """Fetch data from all carbon footprint sources"""
     print("[INFO] Starting comprehensive carbon footprint data collection...")
@@ -268,6 +298,7 @@ def fetch_all_carbon_data():
     transportation = fetch_transportation_emissions()
     food_carbon = fetch_food_carbon_data()
     consumer_products = fetch_consumer_product_emissions()
+    fetch_emission_factors()
     
     # Combine all carbon data
     all_data = []
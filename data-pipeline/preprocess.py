@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from utils import merge_nearest_space, ML_DIR, RAW_DIR, calculate_health_risk_score, calculate_carbon_impact
+from utils import merge_nearest_space, ML_DIR, RAW_DIR, calculate_health_risk_score, calculate_carbon_impact, save_feature_template, get_emission_factors, lifestyle_activities
 import datetime
 from typing import Dict, List, Optional
 
@@ -67,22 +67,47 @@ def create_health_features(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
+# Carbon API lifestyle fields and the fetch_carbon columns holding each location's average
+CARBON_ACTIVITY_COLUMNS = {
+    'daily_miles': 'avg_daily_vehicle_miles',
+    'public_transit_usage': 'public_transit_usage_rate',
+    'electric_vehicle_usage': 'electric_vehicle_penetration',
+    'meat_consumption': 'avg_daily_meat_consumption_kg',
+    'dairy_consumption': 'avg_daily_dairy_consumption_kg',
+    'vegetable_consumption': 'avg_daily_vegetable_consumption_kg',
+    'electronics_purchases': 'avg_monthly_electronics_purchases',
+    'clothing_purchases': 'avg_monthly_clothing_purchases',
+    'furniture_purchases': 'avg_monthly_furniture_purchases'
+}
+
+# Lifestyle fields feeding each emission component
+CARBON_COMPONENT_FIELDS = {
+    'transportation': ['daily_miles'],
+    'food': ['meat_consumption', 'dairy_consumption', 'vegetable_consumption'],
+    'consumer': ['electronics_purchases', 'clothing_purchases', 'furniture_purchases']
+}
+
 def create_carbon_features(df: pd.DataFrame) -> pd.DataFrame:
     """Create carbon footprint and environmental impact features"""
     if df.empty:
         return df
     
-    # Transportation carbon impact
-    if 'estimated_daily_co2_kg' in df.columns:
-        df['transportation_carbon_impact'] = df['estimated_daily_co2_kg']
-    
-    # Food carbon impact
-    if 'estimated_daily_food_co2_kg' in df.columns:
-        df['food_carbon_impact'] = df['estimated_daily_food_co2_kg']
-    
-    # Consumer products carbon impact
-    if 'estimated_monthly_consumer_co2_kg' in df.columns:
-        df['consumer_carbon_impact'] = df['estimated_monthly_consumer_co2_kg'] / 30  # Daily average
+    # Location activity columns scored with the shared emission factor table
+    present = {field: col for field, col in CARBON_ACTIVITY_COLUMNS.items() if col in df.columns}
+    if present:
+        columns = {
+            field: pd.to_numeric(df[present[field]], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+            if field in present else np.zeros(len(df))
+            for field in CARBON_ACTIVITY_COLUMNS
+        }
+        components = get_emission_factors().evaluate(lifestyle_activities(columns), decimals=None)
+        
+        # Rows from a source without any inputs for a component stay missing, not zero
+        for component, fields in CARBON_COMPONENT_FIELDS.items():
+            source_cols = [present[field] for field in fields if field in present]
+            if source_cols and component in components:
+                has_data = df[source_cols].notna().any(axis=1).to_numpy()
+                df[f'{component}_carbon_impact'] = np.where(has_data, components[component], np.nan)
     
     # Total personal carbon footprint
     carbon_cols = [col for col in df.columns if 'carbon_impact' in col]
@@ -276,6 +301,9 @@ def preprocess():
     merged.to_csv(output_file, index=False)
     print(f"[INFO] Enhanced training dataset saved → {output_file}")
     
+    template_file = save_feature_template(output_file)
+    print(f"[INFO] Serving feature template saved → {template_file}")
+    
     # Create separate datasets for different models
     create_model_specific_datasets(merged)
     
@@ -0,0 +1,21 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Generation and the bank format come from the API so the bank matches what it serves
+BASE = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE / "backend"))
+from models.health_advisor import generate_health_recommendations, load_gpt_model
+from services.advice_bank import ADVICE_BANK_PATH, build_advice_bank
+
+# Pre-generate GPT-2 health recommendations for every (condition, AQI category,
+# pollen level) combination so the API can answer from the bank
+parser = argparse.ArgumentParser(description="Pre-generate the health advice bank")
+parser.add_argument("--candidates", type=int, default=4, help="Candidates per combination")
+args = parser.parse_args()
+
+if load_gpt_model() == (None, None):
+    raise SystemExit("GPT-2 model is required to build the advice bank")
+bank = build_advice_bank(generate_health_recommendations, args.candidates)
+bank.save(ADVICE_BANK_PATH)
+print(f"[INFO] Health advice bank saved → {ADVICE_BANK_PATH} ({len(bank.entries)} keys)")
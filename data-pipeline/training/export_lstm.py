@@ -0,0 +1,43 @@
+import json
+import numpy as np
+from pathlib import Path
+import tensorflow as tf
+
+MODEL_PATH = Path(__file__).resolve().parent.parent.parent / "models/lstm_model.h5"
+EXPORT_PATH = Path(__file__).resolve().parent.parent.parent / "models/lstm_model.npz"
+
+# Export the trained LSTM as plain weight arrays so the API can serve it
+# with NumPy instead of importing TensorFlow
+model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+
+specs = []
+arrays = {}
+for layer in model.layers:
+    config = layer.get_config()
+    i = len(specs)
+    if isinstance(layer, tf.keras.layers.LSTM):
+        if config.get("go_backwards") or config.get("stateful"):
+            raise ValueError(f"Unsupported LSTM configuration in layer {layer.name}")
+        kernel, recurrent_kernel, *bias = layer.get_weights()
+        specs.append({
+            "type": "lstm",
+            "units": config["units"],
+            "activation": config["activation"],
+            "recurrent_activation": config["recurrent_activation"],
+            "return_sequences": config["return_sequences"]
+        })
+        arrays[f"layer{i}_kernel"] = kernel
+        arrays[f"layer{i}_recurrent_kernel"] = recurrent_kernel
+        arrays[f"layer{i}_bias"] = bias[0] if bias else np.zeros(kernel.shape[1], dtype=kernel.dtype)
+    elif isinstance(layer, tf.keras.layers.Dense):
+        kernel, *bias = layer.get_weights()
+        specs.append({"type": "dense", "activation": config["activation"]})
+        arrays[f"layer{i}_kernel"] = kernel
+        arrays[f"layer{i}_bias"] = bias[0] if bias else np.zeros(kernel.shape[1], dtype=kernel.dtype)
+    elif isinstance(layer, tf.keras.layers.InputLayer):
+        continue
+    else:
+        raise ValueError(f"Unsupported layer for export: {layer.__class__.__name__}")
+
+np.savez(EXPORT_PATH, config=np.array(json.dumps(specs)), **arrays)
+print(f"LSTM exported ({len(specs)} layers) → {EXPORT_PATH}")
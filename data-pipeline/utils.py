@@ -5,16 +5,31 @@ import requests
 from scipy.spatial import cKDTree
 from typing import Dict, List, Optional, Tuple
 import datetime
+import sys
 
 BASE = Path(__file__).resolve().parent.parent
 RAW_DIR = BASE / "data" / "raw"
 PROC_DIR = BASE / "data" / "processed"
 ML_DIR = BASE / "data" / "ml_ready"
 
+# Emission factors and the serving feature template come from the same code the API uses
+sys.path.append(str(BASE / "backend"))
+from services.emission_factors import EmissionFactorTable, lifestyle_activities, load_emission_factors
+from services.feature_template import TEMPLATE_PATH, compute_template_arrays, get_source_signature, save_template
+
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 PROC_DIR.mkdir(parents=True, exist_ok=True)
 ML_DIR.mkdir(parents=True, exist_ok=True)
 
+def save_feature_template(csv_path: Path, out_path: Optional[Path] = None) -> Path:
+    """Precompute the backend serving feature template (column order + median defaults)"""
+    out_path = out_path or csv_path.with_name(TEMPLATE_PATH.name)
+    df = pd.read_csv(csv_path, low_memory=False)
+    feature_cols, defaults = compute_template_arrays(df)
+    # Signature lets the API detect a template built from a stale dataset
+    save_template(out_path, feature_cols, defaults, get_source_signature(csv_path))
+    return out_path
+
 def load_json(path):
     if not path.exists():
         return pd.DataFrame()
@@ -98,44 +113,40 @@ def calculate_health_risk_score(pollution_data: Dict, health_data: Dict) -> floa
     
     return min(risk_score, 10.0)  # Cap at 10
 
+# Activity data keys mapped to emission factor table activities
+CARBON_ACTIVITY_KEYS = {
+    'vehicle_miles': 'gasoline_car_miles',
+    'public_transit_miles': 'public_transit_miles',
+    'meat_consumption': 'meat_kg',
+    'dairy_consumption': 'dairy_kg',
+    'electricity_kwh': 'electricity_kwh',
+    'electronics_purchases': 'electronics_purchases'
+}
+
+_emission_factors: Optional[EmissionFactorTable] = None
+
+def get_emission_factors() -> EmissionFactorTable:
+    """Load the newest emission factor table once per run"""
+    global _emission_factors
+    if _emission_factors is None:
+        _emission_factors = load_emission_factors()
+        print(f"[INFO] Using emission factors {_emission_factors.version}")
+    return _emission_factors
+
 def calculate_carbon_impact(activity_data: Dict) -> Dict:
     """Calculate carbon footprint impact for various activities"""
-    carbon_impact = {
-        'transportation': 0.0,
-        'food': 0.0,
-        'energy': 0.0,
-        'consumer_goods': 0.0,
-        'total_daily': 0.0
+    activities = {
+        activity: np.array([float(activity_data.get(key, 0.0))])
+        for key, activity in CARBON_ACTIVITY_KEYS.items()
     }
+    components = get_emission_factors().evaluate(activities, decimals=None)
     
-    # Transportation emissions (kg CO2)
-    if 'vehicle_miles' in activity_data:
-        miles = float(activity_data['vehicle_miles'])
-        carbon_impact['transportation'] = miles * 0.411  # Average car emissions
-    
-    if 'public_transit_miles' in activity_data:
-        miles = float(activity_data['public_transit_miles'])
-        carbon_impact['transportation'] += miles * 0.17  # Public transit emissions
-    
-    # Food emissions (kg CO2 per day)
-    if 'meat_consumption' in activity_data:
-        meat_kg = float(activity_data['meat_consumption'])
-        carbon_impact['food'] += meat_kg * 27.0  # Beef emissions
-    
-    if 'dairy_consumption' in activity_data:
-        dairy_kg = float(activity_data['dairy_consumption'])
-        carbon_impact['food'] += dairy_kg * 13.5  # Cheese emissions
-    
-    # Energy consumption (kWh to CO2)
-    if 'electricity_kwh' in activity_data:
-        kwh = float(activity_data['electricity_kwh'])
-        carbon_impact['energy'] = kwh * 0.4  # Average grid emissions
-    
-    # Consumer goods
-    if 'electronics_purchases' in activity_data:
-        electronics = float(activity_data['electronics_purchases'])
-        carbon_impact['consumer_goods'] += electronics * 100.0  # Average electronics
-    
+    carbon_impact = {
+        'transportation': float(components.get('transportation', [0.0])[0]),
+        'food': float(components.get('food', [0.0])[0]),
+        'energy': float(components.get('energy', [0.0])[0]),
+        'consumer_goods': float(components.get('consumer', [0.0])[0])
+    }
     carbon_impact['total_daily'] = sum(carbon_impact.values())
     
     return carbon_impact